@@ -0,0 +1,204 @@
+"""
+Admission control: per-route-class concurrency limits and load shedding.
+
+Every request is classified by method and path:
+
+- checkout: order creation and payment (highest priority)
+- account:  auth, carts and order history
+- browse:   catalog and everything else
+
+Each class has its own concurrency limit, and all classes share one worker
+wide limit. A request over its limit waits in a queue. When a slot frees up
+it goes to the waiting request with the highest priority, so a browse spike
+cannot starve checkout. A request that is still queued after its class's
+timeout, or that finds the queue full, is shed with a 503 and Retry-After.
+That is cheaper than letting every request time out.
+
+Limits apply per worker process; the counters are exposed via
+`controller.snapshot()` (served at /api/admission). Order event streams are
+long-lived and cost almost nothing while idle, so they are exempt.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import re
+from typing import Dict, List, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1").lower() in ("1", "true", "yes")
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "40"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+
+# (class, priority (lower is served first), limit, queue timeout seconds, max queue)
+_CLASS_DEFAULTS = [
+    ("checkout", 0, 40, 10.0, 200),
+    ("account", 1, 24, 3.0, 100),
+    ("browse", 2, 24, 1.0, 100),
+]
+
+# (class, method or None for any, path pattern); first match wins, default is browse
+_RULES = [
+    ("checkout", "POST", re.compile(r"^/api/orders/?$")),
+    ("checkout", None, re.compile(r"^/api/(create-payment-intent|confirm-payment|stripe-webhook|mock-payment)\b")),
+    ("account", None, re.compile(r"^/api/(auth|cart|guest-cart|orders)\b")),
+]
+
+_EXEMPT = re.compile(r"^/api/orders/\d+/events$|^/api/admission$")
+
+
+class RouteClass:
+    def __init__(self, name: str, priority: int, limit: int, queue_timeout: float, max_queue: int):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls, name: str, priority: int, limit: int, queue_timeout: float, max_queue: int) -> "RouteClass":
+        """Defaults overridable via ADMISSION_<NAME>_LIMIT / _QUEUE_TIMEOUT / _MAX_QUEUE"""
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name,
+            priority,
+            int(os.getenv(prefix + "LIMIT", limit)),
+            float(os.getenv(prefix + "QUEUE_TIMEOUT", queue_timeout)),
+            int(os.getenv(prefix + "MAX_QUEUE", max_queue)),
+        )
+
+
+class AdmissionController:
+    """Slot accounting for one worker; only used from its event loop"""
+
+    def __init__(self, classes: List[RouteClass], max_concurrency: int = ADMISSION_MAX_CONCURRENCY):
+        self.classes: Dict[str, RouteClass] = {c.name: c for c in classes}
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def classify(self, method: str, path: str) -> Optional[RouteClass]:
+        """The class a request belongs to, or None if it is exempt"""
+        if _EXEMPT.match(path):
+            return None
+        for name, rule_method, pattern in _RULES:
+            if (rule_method is None or rule_method == method) and pattern.match(path):
+                return self.classes[name]
+        return self.classes["browse"]
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        return self.in_flight < self.max_concurrency and route_class.in_flight < route_class.limit
+
+    def _admit(self, route_class: RouteClass):
+        route_class.in_flight += 1
+        route_class.admitted += 1
+        self.in_flight += 1
+
+    async def acquire(self, route_class: RouteClass) -> bool:
+        """Wait for a slot; False means the request should be shed"""
+        if self._has_room(route_class):
+            self._admit(route_class)
+            return True
+        if route_class.queued >= route_class.max_queue or route_class.queue_timeout <= 0:
+            route_class.shed += 1
+            return False
+
+        slot = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (route_class.priority, next(self._seq), route_class, slot))
+        route_class.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(slot), route_class.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Client went away; hand back a slot granted in the meantime
+            if not slot.cancel():
+                self.release(route_class)
+            raise
+        finally:
+            route_class.queued -= 1
+        # cancel() fails if release() granted the slot just before the timeout
+        if slot.cancel():
+            route_class.shed += 1
+            route_class.timed_out += 1
+            return False
+        return True
+
+    def release(self, route_class: RouteClass):
+        route_class.in_flight -= 1
+        self.in_flight -= 1
+        # Hand freed slots to the highest-priority waiters whose class has room
+        blocked = []
+        while self._waiters and self.in_flight < self.max_concurrency:
+            entry = heapq.heappop(self._waiters)
+            waiter_class, slot = entry[2], entry[3]
+            if slot.done():
+                continue
+            if waiter_class.in_flight >= waiter_class.limit:
+                blocked.append(entry)
+                continue
+            self._admit(waiter_class)
+            slot.set_result(True)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "classes": {
+                c.name: {
+                    "priority": c.priority,
+                    "in_flight": c.in_flight,
+                    "queued": c.queued,
+                    "limit": c.limit,
+                    "max_queue": c.max_queue,
+                    "queue_timeout": c.queue_timeout,
+                    "admitted": c.admitted,
+                    "shed": c.shed,
+                    "timed_out": c.timed_out,
+                }
+                for c in self.classes.values()
+            },
+        }
+
+
+controller = AdmissionController([RouteClass.from_env(*defaults) for defaults in _CLASS_DEFAULTS])
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController = controller, enabled: bool = ADMISSION_CONTROL):
+        self.app = app
+        self.controller = controller
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        route_class = self.controller.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.controller.acquire(route_class):
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API.
+
+Measures, in fresh interpreters:
+- import time of `main` (via `python -X importtime`), with the slowest modules
+- lifespan startup time (schema check and friends)
+
+Usage:
+    python bench_startup.py [--runs 5] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app):
+    t2 = time.perf_counter()
+print(f"{t1 - t0} {t2 - t1}")
+"""
+
+
+def _env(db_path: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+    env.pop("SCHEMA_INITIALIZED", None)
+    return env
+
+
+def measure_importtime(env: dict):
+    """Return (total_us, [(cumulative_us, module), ...]) for `import main`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=HERE, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.rstrip()))
+    total = next(us for us, name in modules if name.strip() == "main")
+    return total, modules
+
+
+def measure_startup(env: dict):
+    """Return (import_seconds, lifespan_startup_seconds) for a fresh process"""
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SNIPPET],
+        cwd=HERE, env=env, capture_output=True, text=True, check=True,
+    )
+    import_s, startup_s = result.stdout.strip().splitlines()[-1].split()
+    return float(import_s), float(startup_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(os.path.join(tmp, "bench.db"))
+
+        totals = []
+        modules = []
+        for _ in range(args.runs):
+            total, modules = measure_importtime(env)
+            totals.append(total / 1000)
+        print(f"import main (-X importtime): median {statistics.median(totals):.1f} ms, "
+              f"min {min(totals):.1f} ms over {args.runs} runs")
+        print("\nSlowest direct imports of main (cumulative, last run):")
+        # One leading space, then two per nesting level; main's imports are level 1
+        direct = [(us, name.strip()) for us, name in modules if len(name) - len(name.lstrip()) == 3]
+        for us, name in sorted(direct, reverse=True)[:args.top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+        imports, startups = [], []
+        for _ in range(args.runs):
+            import_s, startup_s = measure_startup(env)
+            imports.append(import_s * 1000)
+            startups.append(startup_s * 1000)
+        print(f"\nwall-clock import: median {statistics.median(imports):.1f} ms")
+        print(f"lifespan startup:  median {statistics.median(startups):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
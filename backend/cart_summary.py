@@ -0,0 +1,98 @@
+"""
+Cart totals computed in the database and cached per user.
+
+The summary (line totals, subtotal, item count, stock flags) comes from one
+query over cart_items joined to products, using window aggregates so the
+totals arrive with the rows. Results are cached in the shared state store
+under the catalog version, so price or stock edits invalidate them too, and
+under a per-user cart version that every cart write bumps. A reader that
+computed from the old cart can then only fill the old key, never the one
+later readers use.
+"""
+
+import json
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import http_cache
+import models
+import schemas
+import shared_state
+from money import DEFAULT_CURRENCY, from_cents
+
+CART_SUMMARY_TTL = int(os.getenv("CART_SUMMARY_TTL", "300"))
+
+
+def _version_key(user_id: int) -> str:
+    return f"cart-version:{user_id}"
+
+
+def _key(backend: shared_state.SharedStateBackend, user_id: int) -> str:
+    cart_version = backend.get(_version_key(user_id)) or "0"
+    return f"cart-summary:{user_id}:{cart_version}:{http_cache.catalog_version.version}"
+
+
+def compute(db: Session, user_id: int) -> dict:
+    line_total = models.CartItem.quantity * models.Product.price_cents
+    rows = db.execute(
+        select(
+            models.CartItem.id,
+            models.CartItem.product_id,
+            models.CartItem.quantity,
+            models.Product.name,
+            models.Product.price_cents,
+            models.Product.currency,
+            models.Product.stock_quantity,
+            models.Product.is_active,
+            line_total.label("line_total_cents"),
+            func.sum(line_total).over().label("subtotal_cents"),
+            func.sum(models.CartItem.quantity).over().label("item_count"),
+        )
+        .join(models.Product, models.Product.id == models.CartItem.product_id)
+        .where(models.CartItem.user_id == user_id)
+        .order_by(models.CartItem.id)
+    ).all()
+
+    items = [
+        {
+            "cart_item_id": r.id,
+            "product_id": r.product_id,
+            "name": r.name,
+            "quantity": r.quantity,
+            "unit_price": from_cents(r.price_cents),
+            "unit_price_cents": r.price_cents,
+            "line_total": from_cents(r.line_total_cents),
+            "line_total_cents": r.line_total_cents,
+            "stock_quantity": r.stock_quantity,
+            "in_stock": bool(r.is_active) and (r.stock_quantity or 0) >= r.quantity,
+        }
+        for r in rows
+    ]
+    subtotal_cents = rows[0].subtotal_cents if rows else 0
+    return {
+        "items": items,
+        "item_count": rows[0].item_count if rows else 0,
+        "subtotal": from_cents(subtotal_cents),
+        "subtotal_cents": subtotal_cents,
+        "currency": rows[0].currency if rows else DEFAULT_CURRENCY,
+        "all_in_stock": all(item["in_stock"] for item in items),
+    }
+
+
+def get(db: Session, user_id: int) -> dict:
+    """Cached summary for a user, computed on a miss"""
+    backend = shared_state.get_backend()
+    key = _key(backend, user_id)
+    cached = backend.get(key)
+    if cached is not None:
+        return json.loads(cached)
+    summary = schemas.CartSummaryResponse(**compute(db, user_id)).model_dump(mode="json")
+    backend.set(key, json.dumps(summary), ttl=CART_SUMMARY_TTL)
+    return summary
+
+
+def invalidate(user_id: int) -> None:
+    """Call after every committed cart write"""
+    shared_state.get_backend().incr(_version_key(user_id))
@@ -1,15 +1,141 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import os
+import sqlite3
+import threading
+import time
 
 # Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ecommerce.db")
 
+# Optional read replica for read-only traffic (catalog, order history).
+# For local testing this can be a second SQLite file refreshed with
+# sync_sqlite_replica().
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL", "")
+
+# Reads fall back to the primary when the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "1"))
+
+
+def _create_engine(url):
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+
+
 # Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = _create_engine(DATABASE_URL)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+replica_engine = _create_engine(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+
+
+class _LagProbe:
+    """Measures replica lag, at most once per REPLICA_LAG_CHECK_INTERVAL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._lag = None
+
+    def lag(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at >= REPLICA_LAG_CHECK_INTERVAL:
+                self._lag = self._measure()
+                self._checked_at = now
+            return self._lag
+
+    def _measure(self):
+        try:
+            dialect = replica_engine.dialect.name
+            if dialect == "postgresql":
+                with replica_engine.connect() as conn:
+                    lag = conn.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                    )).scalar()
+                return float(lag or 0)
+            if dialect == "sqlite":
+                return _sqlite_replica_lag()
+            return 0.0
+        except Exception as e:
+            print(f"Warning: replica lag check failed: {e}")
+            return None
+
+
+def _sqlite_path(eng):
+    return eng.url.database
+
+
+def _sqlite_replica_lag():
+    # Stand-in replica: stale from the moment the primary file changes after a sync
+    replica_path = _sqlite_path(replica_engine)
+    if not os.path.exists(replica_path):
+        return None
+    primary_mtime = os.path.getmtime(_sqlite_path(engine))
+    replica_mtime = os.path.getmtime(replica_path)
+    if primary_mtime <= replica_mtime:
+        return 0.0
+    return time.time() - replica_mtime
+
+
+_lag_probe = _LagProbe()
+
+
+def replica_lag_seconds():
+    """Current replica lag in seconds, or None if there is no usable replica"""
+    if replica_engine is None:
+        return None
+    return _lag_probe.lag()
+
+
+def get_read_session(require_primary: bool = False):
+    """Session for read-only work: the replica when it is fresh enough, else the primary"""
+    if ReplicaSessionLocal is None or require_primary:
+        return SessionLocal()
+    lag = replica_lag_seconds()
+    if lag is None or lag > REPLICA_MAX_LAG_SECONDS:
+        return SessionLocal()
+    return ReplicaSessionLocal()
+
+
+def sync_sqlite_replica():
+    """Refresh the SQLite stand-in replica with a consistent copy of the primary"""
+    if replica_engine is None or engine.dialect.name != "sqlite" or replica_engine.dialect.name != "sqlite":
+        raise RuntimeError("sync_sqlite_replica() needs SQLite DATABASE_URL and REPLICA_DATABASE_URL")
+    source = sqlite3.connect(_sqlite_path(engine))
+    target = sqlite3.connect(_sqlite_path(replica_engine))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def init_schema():
+    """Create missing tables once per deployment rather than once per worker"""
+    if os.getenv("SCHEMA_INITIALIZED") == "1":
+        return
+    import migrations
+    import models
+    import order_archive
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    # create_all skips existing tables, so add indexes declared since they were created
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    order_archive.create_archive_tables(engine)
+    # Inherited by forked workers so they skip the check
+    os.environ["SCHEMA_INITIALIZED"] = "1"
+
+
+if __name__ == "__main__":
+    sync_sqlite_replica()
+    print("✅ SQLite replica synced")
@@ -9,5 +9,5 @@ fi
 # Initialize database and seed sample data (idempotent)
 python /app/start.py || true
 
-# Start the FastAPI app
-exec uvicorn main:app --host 0.0.0.0 --port 8000
+# Start the FastAPI app under gunicorn (WEB_CONCURRENCY uvicorn workers)
+exec gunicorn -c /app/gunicorn.conf.py main:app
@@ -0,0 +1,96 @@
+"""
+Order status events pushed to clients over server-sent events.
+
+Status changes are published to an in-process broker that hands them to
+the SSE streams of this worker, and are fanned out to other workers through
+the shared state backend's pub/sub channel (a no-op hop with the in-process
+backend). Publishing is thread-safe, so sync endpoints running in the
+threadpool and the Redis listener thread can both call it.
+"""
+
+import asyncio
+import json
+import threading
+import uuid
+from typing import Dict, Set, Tuple
+
+import shared_state
+
+CHANNEL = "order-events"
+
+# Order statuses after which no further transitions are expected
+FINAL_ORDER_STATUSES = {"delivered", "cancelled"}
+
+
+def order_event(order) -> dict:
+    return {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "payment_intent_id": order.payment_intent_id,
+        "updated_at": order.updated_at.isoformat() if order.updated_at else None,
+    }
+
+
+class OrderEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._origin = uuid.uuid4().hex
+        self._listening = False
+
+    def _listen(self):
+        # Receive events published by other workers
+        with self._lock:
+            if self._listening:
+                return
+            self._listening = True
+        shared_state.get_backend().subscribe(CHANNEL, self._on_message)
+
+    def _on_message(self, message: str):
+        envelope = json.loads(message)
+        if envelope["origin"] != self._origin:
+            self._deliver(envelope["event"])
+
+    def _deliver(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["order_id"], ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def subscribe(self, order_id: int) -> asyncio.Queue:
+        """Register a queue (bound to the running loop) for an order's events"""
+        self._listen()
+        queue = asyncio.Queue()
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(order_id, set()).add(entry)
+        return queue
+
+    def unsubscribe(self, order_id: int, queue: asyncio.Queue):
+        with self._lock:
+            entries = self._subscribers.get(order_id, set())
+            entries.difference_update({e for e in entries if e[1] is queue})
+            if not entries:
+                self._subscribers.pop(order_id, None)
+
+    def publish(self, event: dict):
+        """Push an event to local subscribers and to every other worker"""
+        self._deliver(event)
+        try:
+            shared_state.get_backend().publish(CHANNEL, json.dumps({"origin": self._origin, "event": event}))
+        except Exception as e:
+            print(f"Warning: order event fan-out failed: {e}")
+
+
+broker = OrderEventBroker()
+
+
+def publish_order(order):
+    """Publish the current status of an order"""
+    broker.publish(order_event(order))
+
+
+def format_sse(event: dict) -> str:
+    return f"event: order\ndata: {json.dumps(event)}\n\n"
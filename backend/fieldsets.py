@@ -0,0 +1,65 @@
+"""
+Sparse fieldsets (`?fields=id,name,price`) for product payloads.
+
+The requested fields are validated against ProductResponse and mapped to
+the Product columns they need, so the narrowed set is pushed down into the
+SQL SELECT via load_only() instead of being trimmed after a full load.
+"""
+
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import load_only
+
+import models
+
+# Response field -> Product columns needed to produce it
+PRODUCT_FIELD_COLUMNS = {
+    "id": ["id"],
+    "name": ["name"],
+    "description": ["description"],
+    "price": ["price_cents"],
+    "price_cents": ["price_cents"],
+    "currency": ["currency"],
+    "image_url": ["image_url"],
+    "category": ["category"],
+    "stock_quantity": ["stock_quantity"],
+    "is_active": ["is_active"],
+    "created_at": ["created_at"],
+}
+
+
+def parse_product_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a `fields` query parameter; None means the full representation"""
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in PRODUCT_FIELD_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    # The id is always returned; clients need it to key the results
+    if "id" not in selected:
+        selected.insert(0, "id")
+    return selected
+
+
+def product_columns(selected: List[str]) -> list:
+    """Product column attributes needed to render the selected fields"""
+    names = []
+    for field in selected:
+        for column in PRODUCT_FIELD_COLUMNS[field]:
+            if column not in names:
+                names.append(column)
+    return [getattr(models.Product, name) for name in names]
+
+
+def product_load_only(selected: List[str]):
+    """Loader option restricting a Product query to the selected fields"""
+    return load_only(*product_columns(selected))
+
+
+def trim(data: dict, selected: Optional[List[str]]) -> dict:
+    """Drop everything but the selected fields from a serialized product"""
+    if selected is None:
+        return data
+    return {key: data[key] for key in selected}
@@ -0,0 +1,146 @@
+"""
+Carts for anonymous visitors, kept entirely client-side.
+
+The cart is a compact HMAC-signed token holding (product_id, quantity)
+pairs and an expiry. It travels in the `guest_cart` cookie or the
+`X-Guest-Cart` header, and every read or write verifies and re-signs it
+in memory, so guest cart traffic never reaches the database. Tampered or
+expired tokens read as an empty cart.
+
+At login the cart is merged into `cart_items` with one INSERT ... ON
+CONFLICT upsert (quantities add up) against the unique
+(user_id, product_id) index.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import time
+from datetime import datetime
+from typing import Dict
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+import models
+
+GUEST_CART_SECRET = os.getenv("GUEST_CART_SECRET") or os.getenv("SECRET_KEY", "your-secret-key-here")
+GUEST_CART_TTL_DAYS = int(os.getenv("GUEST_CART_TTL_DAYS", "30"))
+COOKIE_NAME = "guest_cart"
+HEADER_NAME = "X-Guest-Cart"
+MAX_ITEMS = 50
+MAX_QUANTITY = 99
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> str:
+    digest = hmac.new(GUEST_CART_SECRET.encode("utf-8"), payload, hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+
+def encode(items: Dict[int, int]) -> str:
+    """Sign a cart as `<payload>.<signature>`; the payload is `expiry|id:qty,...`"""
+    expires = int(time.time()) + GUEST_CART_TTL_DAYS * 86400
+    body = ",".join(f"{pid}:{qty}" for pid, qty in items.items())
+    payload = f"{expires}|{body}".encode("ascii")
+    return f"{_b64encode(payload)}.{_sign(payload)}"
+
+
+def decode(token: str) -> Dict[int, int]:
+    """Verify a token and return its items; invalid or expired tokens give an empty cart"""
+    try:
+        encoded, signature = token.split(".", 1)
+        payload = _b64decode(encoded)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return {}
+        expires, _, body = payload.decode("ascii").partition("|")
+        if int(expires) < time.time():
+            return {}
+        items = {}
+        for pair in filter(None, body.split(",")):
+            pid, qty = pair.split(":")
+            items[int(pid)] = int(qty)
+        return items
+    except (ValueError, UnicodeDecodeError):
+        return {}
+
+
+def read(request: Request) -> Dict[int, int]:
+    """The guest cart presented with a request (header first, then cookie)"""
+    token = request.headers.get(HEADER_NAME) or request.cookies.get(COOKIE_NAME)
+    return decode(token) if token else {}
+
+
+def set_quantity(items: Dict[int, int], product_id: int, quantity: int) -> Dict[int, int]:
+    if quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+    if product_id not in items and len(items) >= MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A guest cart holds at most {MAX_ITEMS} products")
+    items[product_id] = min(quantity, MAX_QUANTITY)
+    return items
+
+
+def add(items: Dict[int, int], product_id: int, quantity: int) -> Dict[int, int]:
+    if quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+    return set_quantity(items, product_id, items.get(product_id, 0) + quantity)
+
+
+def respond(response: Response, items: Dict[int, int]) -> dict:
+    """Re-sign the cart, set the cookie and build the response body"""
+    token = encode(items)
+    response.set_cookie(
+        COOKIE_NAME, token,
+        max_age=GUEST_CART_TTL_DAYS * 86400,
+        httponly=True,
+        samesite="lax",
+    )
+    return {
+        "items": [{"product_id": pid, "quantity": qty} for pid, qty in items.items()],
+        "item_count": sum(items.values()),
+        "token": token,
+    }
+
+
+def _upsert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Guest cart merge does not support {dialect}")
+    return insert(models.CartItem)
+
+
+def merge(db: Session, user_id: int, items: Dict[int, int]) -> int:
+    """Add a guest cart to the user's cart in one upsert; returns products merged"""
+    if not items:
+        return 0
+    # Tokens are only signed, not checked against the catalog, so drop stale ids
+    valid = {
+        pid for (pid,) in db.query(models.Product.id).filter(
+            models.Product.id.in_(list(items)),
+            models.Product.is_active == True,
+        )
+    }
+    rows = [{"user_id": user_id, "product_id": pid, "quantity": qty} for pid, qty in items.items() if pid in valid]
+    if not rows:
+        return 0
+    stmt = _upsert(db).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.CartItem.user_id, models.CartItem.product_id],
+        # onupdate defaults don't apply to ON CONFLICT, so bump the activity time here
+        set_={"quantity": models.CartItem.quantity + stmt.excluded.quantity, "updated_at": datetime.utcnow()},
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(rows)
@@ -0,0 +1,86 @@
+"""
+Production server configuration.
+
+Run with:
+    gunicorn -c gunicorn.conf.py main:app
+
+Gunicorn supervises N uvicorn worker processes forked from a preloaded
+master, so the app (and the schema check) is imported once. SIGTERM drains
+in-flight requests for up to GRACEFUL_TIMEOUT seconds before workers exit.
+"""
+
+import multiprocessing
+import os
+import resource
+import threading
+import time
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app in the master and fork workers from it (copy-on-write)
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+
+# Recycle workers after this many requests to bound memory growth (0 disables)
+max_requests = int(os.getenv("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = os.getenv("ACCESS_LOG", "-")
+errorlog = "-"
+
+# Seconds between per-worker resource reports (0 disables)
+WORKER_STATS_INTERVAL = int(os.getenv("WORKER_STATS_INTERVAL", "300"))
+
+
+def _usage(worker) -> str:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux
+    return (
+        f"pid={worker.pid} max_rss={usage.ru_maxrss // 1024}MiB "
+        f"user_cpu={usage.ru_utime:.1f}s sys_cpu={usage.ru_stime:.1f}s"
+    )
+
+
+def on_starting(server):
+    # Without a shared store every worker keeps its own catalog version,
+    # caches and rate limit windows, so more than one worker would disagree
+    from dotenv import load_dotenv
+    load_dotenv()
+    if server.num_workers > 1 and not os.getenv("SHARED_STATE_URL"):
+        server.log.warning(
+            "SHARED_STATE_URL is not set; starting 1 worker instead of %d. "
+            "Point it at Redis to run several workers.", server.num_workers
+        )
+        server.num_workers = 1
+        server.cfg.set("workers", 1)
+
+    # Create tables once in the master; workers inherit SCHEMA_INITIALIZED
+    from database import init_schema
+    init_schema()
+
+
+def post_fork(server, worker):
+    # Never share pooled DB connections opened in the master across processes
+    from database import engine
+    engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    if WORKER_STATS_INTERVAL <= 0:
+        return
+
+    def report():
+        while worker.alive:
+            time.sleep(WORKER_STATS_INTERVAL)
+            worker.log.info("worker stats: %s", _usage(worker))
+
+    threading.Thread(target=report, name="worker-stats", daemon=True).start()
+
+
+def worker_exit(server, worker):
+    server.log.info("worker exiting: %s", _usage(worker))
@@ -0,0 +1,170 @@
+"""
+HTTP caching helpers for the catalog endpoints.
+
+Catalog responses carry a strong ETag derived from a catalog version counter
+that is bumped on every product write, so clients and CDNs can revalidate
+with If-None-Match and get a 304 without the API touching the database.
+
+The counter lives in the shared state backend so every worker agrees on it;
+each worker keeps a local copy that is refreshed through the invalidation
+channel instead of being fetched per request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+import shared_state
+
+INVALIDATION_CHANNEL = "cache-invalidate"
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+# Pub/sub is at-most-once, so the local copy is also re-read from the store this often
+CATALOG_VERSION_SYNC_SECONDS = float(os.getenv("CATALOG_VERSION_SYNC_SECONDS", "1"))
+
+
+class CatalogVersion:
+    """
+    Monotonic version counter for the product catalog.
+
+    The shared store is the source of truth. Invalidation messages update
+    the local copy at once, and a periodic re-read catches any they missed.
+    """
+
+    KEY = "catalog:version"
+    MODIFIED_KEY = "catalog:last_modified"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = 0
+        self._last_modified = 0.0
+        self._synced_at = 0.0
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            backend = shared_state.get_backend()
+            backend.subscribe(INVALIDATION_CHANNEL, self._on_invalidate)
+            # Seed with the start time so ETags never repeat across restarts
+            now = time.time()
+            backend.set(self.KEY, str(int(now * 1000)), nx=True)
+            backend.set(self.MODIFIED_KEY, str(now), nx=True)
+            self._version = int(backend.get(self.KEY))
+            self._last_modified = float(backend.get(self.MODIFIED_KEY) or now)
+            self._synced_at = time.monotonic()
+            self._loaded = True
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._synced_at < CATALOG_VERSION_SYNC_SECONDS:
+            return
+        self._synced_at = now
+        backend = shared_state.get_backend()
+        try:
+            version, last_modified = backend.get_many([self.KEY, self.MODIFIED_KEY])
+            if version is None:
+                # The store lost the counter; restore it so bumps keep increasing
+                backend.set(self.KEY, str(self._version), nx=True)
+                return
+            self._apply(int(version), float(last_modified or time.time()))
+        except Exception as e:
+            print(f"Warning: catalog version sync failed: {e}")
+
+    def _apply(self, version: int, last_modified: float):
+        with self._lock:
+            if version > self._version:
+                self._version = version
+                self._last_modified = last_modified
+
+    def _on_invalidate(self, message: str):
+        event = json.loads(message)
+        if event.get("scope") == "catalog":
+            self._apply(int(event["version"]), float(event["last_modified"]))
+
+    @property
+    def version(self) -> int:
+        if not self._loaded:
+            self._load()
+        self._sync()
+        return self._version
+
+    @property
+    def last_modified(self) -> float:
+        if not self._loaded:
+            self._load()
+        self._sync()
+        return self._last_modified
+
+    def bump(self) -> int:
+        """Mark the catalog as changed in every worker and return the new version"""
+        if not self._loaded:
+            self._load()
+        backend = shared_state.get_backend()
+        version = backend.incr(self.KEY)
+        now = time.time()
+        backend.set(self.MODIFIED_KEY, str(now))
+        self._apply(version, now)
+        backend.publish(INVALIDATION_CHANNEL, json.dumps({"scope": "catalog", "version": version, "last_modified": now}))
+        return version
+
+
+catalog_version = CatalogVersion()
+
+
+def catalog_etag(request: Request, locale: str) -> str:
+    """Build a strong ETag for a catalog response in the given locale"""
+    key = f"{catalog_version.version}|{locale}|{request.url.path}|{request.url.query}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def catalog_cache_headers(etag: str) -> dict:
+    """Validator and freshness headers shared by 200 and 304 responses"""
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(catalog_version.last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={CATALOG_CACHE_MAX_AGE}",
+        "Vary": "Accept-Language",
+    }
+
+
+def _if_none_match_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # Weak comparison is allowed for If-None-Match (RFC 9110 13.1.2)
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(catalog_version.last_modified) <= since
+
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client's cached copy is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _if_none_match_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since) and _not_modified_since(if_modified_since)
+    if not fresh:
+        return None
+    return Response(status_code=304, headers=catalog_cache_headers(etag))
@@ -1,7 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+import asyncio
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import threading
+
+from fastapi import FastAPI, HTTPException, Depends, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List, Optional
 import jwt
 from datetime import datetime, timedelta
@@ -9,18 +17,65 @@ import bcrypt
 import os
 from dotenv import load_dotenv
 
-from database import SessionLocal, engine
+# Load environment variables from .env before any module reads its settings
+load_dotenv()
+
+from database import SessionLocal, get_read_session, init_schema, replica_engine
 import models
 import schemas
-from stripe_service import StripeService
+import http_cache
+import shared_state
+import fieldsets
+import order_archive
+import events
+import cart_summary
+import product_cache
+import guest_cart
+from rate_limit import login_rate_limit, cart_rate_limit
+from compression import CompressionMiddleware
+import admission
+
+# Payment mode (stripe or mock)
+PAYMENT_MODE = os.getenv("PAYMENT_MODE")
+if not PAYMENT_MODE:
+    PAYMENT_MODE = "stripe" if os.getenv("STRIPE_SECRET_KEY") else "mock"
+
+
+@lru_cache(maxsize=None)
+def get_stripe_service():
+    """Create the Stripe service on first use; importing the SDK is slow"""
+    if not os.getenv("STRIPE_SECRET_KEY"):
+        return None
+    try:
+        from stripe_service import StripeService
+        return StripeService()
+    except Exception as e:
+        print(f"Warning: Stripe service not initialized: {e}")
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables (no-op in workers forked from a launcher that already did it)
+    init_schema()
+    print(f"Payment mode: {PAYMENT_MODE}")
+    if PAYMENT_MODE == "stripe":
+        # Warm the Stripe SDK off the startup path so readiness isn't delayed
+        threading.Thread(target=get_stripe_service, name="stripe-warmup", daemon=True).start()
+    worker = None
+    if int(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "0")) > 0:
+        from maintenance import MaintenanceWorker
+        worker = MaintenanceWorker()
+        worker.start()
+    yield
+    if worker:
+        worker.stop()
 
-# Load environment variables from .env
-load_dotenv()
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+app = FastAPI(title="Ecommerce API", version="1.0.0", lifespan=lifespan)
 
-app = FastAPI(title="Ecommerce API", version="1.0.0")
+# Per-route-class concurrency limits; added first so shed responses still get CORS headers
+app.add_middleware(admission.AdmissionMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -31,25 +86,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON payloads (brotli if installed, gzip otherwise)
+app.add_middleware(CompressionMiddleware)
+
 # Security
 security = HTTPBearer()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 
-# Stripe service (initialize only if Stripe keys are available)
-stripe_service = None
-try:
-    if os.getenv("STRIPE_SECRET_KEY"):
-        stripe_service = StripeService()
-except Exception as e:
-    print(f"Warning: Stripe service not initialized: {e}")
-
-# Payment mode (stripe or mock)
-PAYMENT_MODE = os.getenv("PAYMENT_MODE")
-if not PAYMENT_MODE:
-    PAYMENT_MODE = "stripe" if stripe_service else "mock"
-print(f"Payment mode: {PAYMENT_MODE}")
-
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -58,21 +102,57 @@ def get_db():
     finally:
         db.close()
 
-# Authentication dependency
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+# Reads that must observe a just-committed write stay on the primary this long
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "10"))
+
+def _mark_write(scope: str):
+    if replica_engine is not None:
+        shared_state.get_backend().set(f"recent-write:{scope}", "1", ttl=READ_AFTER_WRITE_SECONDS)
+
+def _recently_written(scope: str) -> bool:
+    return replica_engine is not None and shared_state.get_backend().get(f"recent-write:{scope}") is not None
+
+# Read-only catalog session (replica when fresh, primary right after a catalog write)
+def get_catalog_db():
+    db = get_read_session(require_primary=_recently_written("catalog"))
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        yield db
+    finally:
+        db.close()
+
+def _user_id_from_token(token: str) -> int:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
-        if user_id is None:
+        # Scoped tokens (e.g. for one order's event stream) are not account tokens
+        if user_id is None or "scope" in payload:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return user_id
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    user_id = _user_id_from_token(credentials.credentials)
     
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
+# Read-only session for the current user's data (primary right after they wrote)
+def get_user_read_db(current_user: models.User = Depends(get_current_user)):
+    db = get_read_session(require_primary=_recently_written(f"user:{current_user.id}"))
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Operational endpoints
+@app.get("/api/admission")
+async def admission_metrics():
+    """Admission control counters (in flight, queue depth, shed) for this worker"""
+    return admission.controller.snapshot()
+
 # Auth endpoints
 @app.post("/api/auth/register", response_model=schemas.UserResponse)
 def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
@@ -96,8 +176,8 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     
     return db_user
 
-@app.post("/api/auth/login")
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
+@app.post("/api/auth/login", dependencies=[Depends(login_rate_limit)])
+def login(user: schemas.UserLogin, request: Request, response: Response, db: Session = Depends(get_db)):
     # Find user
     db_user = db.query(models.User).filter(models.User.email == user.email).first()
     if not db_user:
@@ -114,8 +194,15 @@ def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
         SECRET_KEY,
         algorithm=ALGORITHM
     )
-    
-    return {"access_token": access_token, "token_type": "bearer", "user": db_user}
+
+    # Carry over anything added to the cart before signing in
+    merged = guest_cart.merge(db, db_user.id, guest_cart.read(request))
+    if merged:
+        cart_summary.invalidate(db_user.id)
+        _mark_write(f"user:{db_user.id}")
+    response.delete_cookie(guest_cart.COOKIE_NAME)
+
+    return {"access_token": access_token, "token_type": "bearer", "user": db_user, "guest_cart_merged": merged}
 
 # Product endpoints
 # Locale helpers and localized content map
@@ -169,7 +256,10 @@ def _extract_locale(lang_param: Optional[str], request: Request) -> str:
     return "en"
 
 
-def _serialize_product(prod: models.Product, locale: str) -> dict:
+def _serialize_product(prod: models.Product, locale: Optional[str], fields: Optional[List[str]] = None) -> dict:
+    if fields is not None:
+        # Only touch the selected attributes; the rest were never loaded
+        return {f: _product_field(prod, f, locale) for f in fields}
     overrides = PRODUCT_LOCALIZED_CONTENT.get(locale, {}).get(prod.id, {})
     name = overrides.get("name", prod.name)
     description = overrides.get("description", prod.description)
@@ -178,6 +268,8 @@ def _serialize_product(prod: models.Product, locale: str) -> dict:
         "name": name,
         "description": description,
         "price": prod.price,
+        "price_cents": prod.price_cents,
+        "currency": prod.currency,
         "image_url": prod.image_url,
         "category": prod.category,
         "stock_quantity": prod.stock_quantity,
@@ -186,26 +278,180 @@ def _serialize_product(prod: models.Product, locale: str) -> dict:
     }
 
 
+def _product_field(prod: models.Product, field: str, locale: Optional[str]):
+    if field in ("name", "description"):
+        overrides = PRODUCT_LOCALIZED_CONTENT.get(locale, {}).get(prod.id, {})
+        if field in overrides:
+            return overrides[field]
+    return getattr(prod, field)
+
+
+def _sparse_response(payload, headers: Optional[dict] = None) -> JSONResponse:
+    # Partial payloads would fail response_model validation, so they bypass it
+    return JSONResponse(content=jsonable_encoder(payload), headers=headers)
+
+
+MAX_BATCH_PRODUCT_IDS = 100
+
+def _parse_product_ids(ids: str) -> List[int]:
+    try:
+        product_ids = [int(pid) for pid in ids.split(",") if pid.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of product ids")
+    if len(product_ids) > MAX_BATCH_PRODUCT_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PRODUCT_IDS} ids per request")
+    return product_ids
+
+
+def _serialize_cart_item(item: models.CartItem, fields: List[str]) -> dict:
+    return {
+        "id": item.id,
+        "user_id": item.user_id,
+        "product_id": item.product_id,
+        "quantity": item.quantity,
+        "created_at": item.created_at,
+        "product": _serialize_product(item.product, None, fields),
+    }
+
+
+def _order_columns(order: models.Order) -> dict:
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "total_amount": order.total_amount,
+        "total_amount_cents": order.total_amount_cents,
+        "currency": order.currency,
+        "shipping_address": order.shipping_address,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "payment_intent_id": order.payment_intent_id,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+    }
+
+
+def _serialize_order(order: models.Order, fields: Optional[List[str]]) -> dict:
+    return {
+        **_order_columns(order),
+        "order_items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": item.price,
+                "price_cents": item.price_cents,
+                "product": _serialize_product(item.product, None, fields),
+            }
+            for item in order.order_items
+        ],
+    }
+
+
+def _snapshot_order(order: models.Order, selected: Optional[List[str]]) -> dict:
+    """Live status columns plus the items captured when the order was placed"""
+    return {
+        **_order_columns(order),
+        "order_items": [
+            {**item, "product": fieldsets.trim(item["product"], selected)}
+            for item in order.snapshot["order_items"]
+        ],
+    }
+
+
+def _trim_archived_order(data: dict, selected: Optional[List[str]]) -> dict:
+    for item in data["order_items"]:
+        item["product"] = fieldsets.trim(item["product"], selected)
+    return data
+
+
+def _order_items_loader(selected: Optional[List[str]]):
+    loader = selectinload(models.Order.order_items).joinedload(models.OrderItem.product)
+    if selected:
+        # `fields` narrows the product embedded in each order item
+        loader = loader.options(fieldsets.product_load_only(selected))
+    return loader
+
+
+def _render_orders(db: Session, orders: List[models.Order], selected: Optional[List[str]]) -> List[dict]:
+    legacy = [o.id for o in orders if o.snapshot is None]
+    if legacy:
+        # Orders placed before snapshots existed are rebuilt from their items in one extra query
+        db.query(models.Order).filter(models.Order.id.in_(legacy)).options(_order_items_loader(selected)).all()
+    return [
+        _snapshot_order(o, selected) if o.snapshot is not None else _serialize_order(o, selected)
+        for o in orders
+    ]
+
+
 @app.get("/api/products", response_model=List[schemas.ProductResponse])
 def get_products(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
     lang: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
     request: Request = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_catalog_db),
 ):
-    products = db.query(models.Product).offset(skip).limit(limit).all()
+    """List products, or with `ids=1,2,3` fetch exactly those, in that order"""
+    selected = fieldsets.parse_product_fields(fields)
     locale = _extract_locale(lang, request)
+    product_ids = _parse_product_ids(ids) if ids is not None else None
+    # Revalidate against the catalog version before hitting the database
+    etag = http_cache.catalog_etag(request, locale)
+    not_modified = http_cache.not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    if product_ids is not None:
+        # Cache hits never touch the database; misses load in one IN query
+        found = product_cache.get_many(db, product_ids, locale, _serialize_product)
+        payload = [fieldsets.trim(found[pid], selected) for pid in product_ids if pid in found]
+        return _sparse_response(payload, http_cache.catalog_cache_headers(etag))
+    query = db.query(models.Product)
+    if selected:
+        query = query.options(fieldsets.product_load_only(selected))
+    products = query.offset(skip).limit(limit).all()
+    if selected:
+        payload = [_serialize_product(p, locale, selected) for p in products]
+        return _sparse_response(payload, http_cache.catalog_cache_headers(etag))
+    response.headers.update(http_cache.catalog_cache_headers(etag))
     return [_serialize_product(p, locale) for p in products]
 
 
 @app.get("/api/products/{product_id}", response_model=schemas.ProductResponse)
-def get_product(product_id: int, lang: Optional[str] = None, request: Request = None, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+def get_product(product_id: int, lang: Optional[str] = None, fields: Optional[str] = None, request: Request = None, db: Session = Depends(get_catalog_db)):
+    selected = fieldsets.parse_product_fields(fields)
+    locale = _extract_locale(lang, request)
+    etag = http_cache.catalog_etag(request, locale)
+    not_modified = http_cache.not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    product = product_cache.get_many(db, [product_id], locale, _serialize_product).get(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    return _sparse_response(fieldsets.trim(product, selected), http_cache.catalog_cache_headers(etag))
+
+@lru_cache(maxsize=None)
+def get_related_index():
+    """Memory-mapped recommendations index, loaded on first use (imports NumPy)"""
+    from recommendations import RelatedIndex
+    return RelatedIndex()
+
+
+@app.get("/api/products/{product_id}/related", response_model=List[schemas.ProductResponse])
+def get_related_products(product_id: int, limit: int = 8, lang: Optional[str] = None, request: Request = None, db: Session = Depends(get_catalog_db)):
+    """Products frequently bought together with this one (from the precomputed index)"""
+    related_ids = get_related_index().related(product_id, max(0, min(limit, 50)))
+    if not related_ids:
+        return []
+    products = db.query(models.Product).filter(
+        models.Product.id.in_(related_ids),
+        models.Product.is_active == True,
+    ).all()
+    by_id = {p.id: p for p in products}
     locale = _extract_locale(lang, request)
-    return _serialize_product(product, locale)
+    return [_serialize_product(by_id[pid], locale) for pid in related_ids if pid in by_id]
 
 @app.post("/api/products", response_model=schemas.ProductResponse)
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -213,15 +459,27 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    _mark_write("catalog")
+    http_cache.catalog_version.bump()
     return db_product
 
 # Cart endpoints
 @app.get("/api/cart", response_model=List[schemas.CartItemResponse])
-def get_cart(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    cart_items = db.query(models.CartItem).filter(models.CartItem.user_id == current_user.id).all()
-    return cart_items
-
-@app.post("/api/cart", response_model=schemas.CartItemResponse)
+def get_cart(fields: Optional[str] = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = fieldsets.parse_product_fields(fields)
+    query = db.query(models.CartItem).filter(models.CartItem.user_id == current_user.id)
+    if selected:
+        # `fields` narrows the embedded product; load it in the same SELECT
+        query = query.options(joinedload(models.CartItem.product).options(fieldsets.product_load_only(selected)))
+        return _sparse_response([_serialize_cart_item(item, selected) for item in query.all()])
+    return query.all()
+
+@app.get("/api/cart/summary", response_model=schemas.CartSummaryResponse)
+def get_cart_summary(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Line totals, subtotal, item count and stock flags in one query (cached per user)"""
+    return cart_summary.get(db, current_user.id)
+
+@app.post("/api/cart", response_model=schemas.CartItemResponse, dependencies=[Depends(cart_rate_limit)])
 def add_to_cart(cart_item: schemas.CartItemCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     # Check if item already in cart
     existing_item = db.query(models.CartItem).filter(
@@ -232,6 +490,7 @@ def add_to_cart(cart_item: schemas.CartItemCreate, current_user: models.User = D
     if existing_item:
         existing_item.quantity += cart_item.quantity
         db.commit()
+        cart_summary.invalidate(current_user.id)
         db.refresh(existing_item)
         return existing_item
     else:
@@ -242,10 +501,11 @@ def add_to_cart(cart_item: schemas.CartItemCreate, current_user: models.User = D
         )
         db.add(db_cart_item)
         db.commit()
+        cart_summary.invalidate(current_user.id)
         db.refresh(db_cart_item)
         return db_cart_item
 
-@app.delete("/api/cart/{item_id}")
+@app.delete("/api/cart/{item_id}", dependencies=[Depends(cart_rate_limit)])
 def remove_from_cart(item_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     cart_item = db.query(models.CartItem).filter(
         models.CartItem.id == item_id,
@@ -257,51 +517,217 @@ def remove_from_cart(item_id: int, current_user: models.User = Depends(get_curre
     
     db.delete(cart_item)
     db.commit()
+    cart_summary.invalidate(current_user.id)
     return {"message": "Item removed from cart"}
 
+# Guest cart endpoints (signed token, no database access)
+@app.get("/api/guest-cart", response_model=schemas.GuestCartResponse)
+async def get_guest_cart(request: Request, response: Response):
+    return guest_cart.respond(response, guest_cart.read(request))
+
+@app.post("/api/guest-cart", response_model=schemas.GuestCartResponse, dependencies=[Depends(cart_rate_limit)])
+async def add_to_guest_cart(cart_item: schemas.CartItemCreate, request: Request, response: Response):
+    items = guest_cart.add(guest_cart.read(request), cart_item.product_id, cart_item.quantity)
+    return guest_cart.respond(response, items)
+
+@app.put("/api/guest-cart", response_model=schemas.GuestCartResponse, dependencies=[Depends(cart_rate_limit)])
+async def update_guest_cart(cart_item: schemas.CartItemCreate, request: Request, response: Response):
+    """Set the quantity of one product in the guest cart"""
+    items = guest_cart.set_quantity(guest_cart.read(request), cart_item.product_id, cart_item.quantity)
+    return guest_cart.respond(response, items)
+
+@app.delete("/api/guest-cart/{product_id}", response_model=schemas.GuestCartResponse, dependencies=[Depends(cart_rate_limit)])
+async def remove_from_guest_cart(product_id: int, request: Request, response: Response):
+    items = guest_cart.read(request)
+    items.pop(product_id, None)
+    return guest_cart.respond(response, items)
+
 # Order endpoints
 @app.post("/api/orders", response_model=schemas.OrderResponse)
 def create_order(order: schemas.OrderCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Create order
+    products = {
+        p.id: p for p in db.query(models.Product).filter(
+            models.Product.id.in_([item.product_id for item in order.items])
+        )
+    }
+    missing = sorted({item.product_id for item in order.items} - products.keys())
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Unknown product(s): {', '.join(map(str, missing))}")
+    if not order.items or any(item.quantity < 1 for item in order.items):
+        raise HTTPException(status_code=400, detail="An order needs at least one item, each with quantity at least 1")
+
+    # Create order; the total is set from the priced items below
     db_order = models.Order(
         user_id=current_user.id,
-        total_amount=order.total_amount,
+        total_amount_cents=0,
         status="pending",
         shipping_address=order.shipping_address
     )
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
     
-    # Create order items
-    for item in order.items:
-        db_order_item = models.OrderItem(
-            order_id=db_order.id,
+    # Create order items, priced from the catalog rather than the request body
+    db_items = [
+        models.OrderItem(
+            order=db_order,
             product_id=item.product_id,
             quantity=item.quantity,
-            price=item.price
+            price_cents=products[item.product_id].price_cents
         )
-        db.add(db_order_item)
+        for item in order.items
+    ]
+    db.add_all(db_items)
+    db_order.total_amount_cents = sum(item.price_cents * item.quantity for item in db_items)
+    db.flush()
+
+    # Freeze items and products as purchased, so history never shows later edits
+    db_order.snapshot = {
+        "order_items": [
+            schemas.OrderItemResponse.model_validate({
+                "id": item.id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": item.price,
+                "price_cents": item.price_cents,
+                "product": _serialize_product(products[item.product_id], None),
+            }).model_dump(mode="json")
+            for item in db_items
+        ]
+    }
     
     # Do NOT clear the cart here. It will be cleared after successful payment.
     db.commit()
-    return db_order
+    _mark_write(f"user:{current_user.id}")
+    return _snapshot_order(db_order, None)
 
 @app.get("/api/orders", response_model=List[schemas.OrderResponse])
-def get_orders(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_orders(fields: Optional[str] = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_user_read_db)):
+    selected = fieldsets.parse_product_fields(fields)
+    # Archived orders are the oldest, so they come before the live ones
+    archived = [_trim_archived_order(o, selected) for o in order_archive.load_archived_orders(db, current_user.id)]
+    # One indexed read; items come from each order's snapshot
     orders = db.query(models.Order).filter(models.Order.user_id == current_user.id).all()
-    return orders
+    payload = archived + _render_orders(db, orders, selected)
+    return _sparse_response(payload) if selected else payload
 
 @app.get("/api/orders/{order_id}", response_model=schemas.OrderResponse)
-def get_order(order_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_order(order_id: int, fields: Optional[str] = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_user_read_db)):
+    selected = fieldsets.parse_product_fields(fields)
     order = db.query(models.Order).filter(
         models.Order.id == order_id,
         models.Order.user_id == current_user.id
     ).first()
     
     if not order:
+        archived = order_archive.load_archived_order(db, order_id, current_user.id)
+        if archived is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        archived = _trim_archived_order(archived, selected)
+        return _sparse_response(archived) if selected else archived
+    payload = _render_orders(db, [order], selected)[0]
+    return _sparse_response(payload) if selected else payload
+
+# Order status stream
+ORDER_EVENTS_KEEPALIVE_SECONDS = 15
+# Streams end after this long; EventSource clients reconnect transparently
+ORDER_EVENTS_MAX_SECONDS = int(os.getenv("ORDER_EVENTS_MAX_SECONDS", "300"))
+# Lifetime of the stream token; it only has to be valid when the stream opens
+ORDER_EVENTS_TOKEN_SECONDS = int(os.getenv("ORDER_EVENTS_TOKEN_SECONDS", "60"))
+ORDER_EVENTS_SCOPE = "order-events"
+
+def _user_id_from_order_events_token(token: str, order_id: int) -> int:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    if payload.get("scope") != ORDER_EVENTS_SCOPE or payload.get("order_id") != order_id or payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return payload["sub"]
+
+def _order_state(order_id: int, user_id: int) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        order = db.query(models.Order).filter(
+            models.Order.id == order_id,
+            models.Order.user_id == user_id
+        ).first()
+        if order:
+            return events.order_event(order)
+        archived = order_archive.load_archived_order(db, order_id, user_id)
+        if archived:
+            return {
+                "order_id": order_id,
+                "user_id": user_id,
+                "status": archived["status"],
+                "payment_status": archived["payment_status"],
+                "payment_intent_id": archived["payment_intent_id"],
+                "updated_at": archived["updated_at"],
+            }
+        return None
+    finally:
+        db.close()
+
+@app.post("/api/orders/{order_id}/events-token")
+def create_order_events_token(order_id: int, current_user: models.User = Depends(get_current_user)):
+    """Short-lived token for one order's event stream, for clients that can't send headers"""
+    token = jwt.encode(
+        {
+            "sub": current_user.id,
+            "order_id": order_id,
+            "scope": ORDER_EVENTS_SCOPE,
+            "exp": datetime.utcnow() + timedelta(seconds=ORDER_EVENTS_TOKEN_SECONDS),
+        },
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+    return {"token": token, "expires_in": ORDER_EVENTS_TOKEN_SECONDS}
+
+@app.get("/api/orders/{order_id}/events")
+async def order_events(order_id: int, request: Request, token: Optional[str] = None):
+    """Stream order status changes as server-sent events (replaces polling)"""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        user_id = _user_id_from_token(auth[7:])
+    elif token:
+        # EventSource cannot set headers. URLs end up in access logs, so the
+        # query string only takes the short-lived token scoped to this order
+        user_id = _user_id_from_order_events_token(token, order_id)
+    else:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    # Subscribe before reading the current state so no transition is missed
+    queue = events.broker.subscribe(order_id)
+    current = await run_in_threadpool(_order_state, order_id, user_id)
+    if current is None:
+        events.broker.unsubscribe(order_id, queue)
         raise HTTPException(status_code=404, detail="Order not found")
-    return order
+
+    async def stream():
+        try:
+            yield events.format_sse(current)
+            if current["status"] in events.FINAL_ORDER_STATUSES:
+                return
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + ORDER_EVENTS_MAX_SECONDS
+            while loop.time() < deadline:
+                timeout = min(ORDER_EVENTS_KEEPALIVE_SECONDS, deadline - loop.time())
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield events.format_sse(event)
+                if event["status"] in events.FINAL_ORDER_STATUSES:
+                    return
+        finally:
+            events.broker.unsubscribe(order_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Payment endpoints
 @app.post("/api/create-payment-intent")
@@ -314,6 +740,7 @@ def create_payment_intent(
     # Check mode
     if PAYMENT_MODE != "stripe":
         raise HTTPException(status_code=400, detail="Stripe is disabled. Set PAYMENT_MODE=stripe to enable.")
+    stripe_service = get_stripe_service()
     if not stripe_service:
         raise HTTPException(status_code=500, detail="Payment service not available")
     
@@ -339,12 +766,10 @@ def create_payment_intent(
             current_user.stripe_customer_id = customer_id
             db.commit()
         
-        # Convert amount to cents
-        amount_cents = int(order.total_amount * 100)
-        
-        # Create payment intent
+        # Create payment intent (amounts are already stored in cents)
         payment_intent = stripe_service.create_payment_intent(
-            amount=amount_cents,
+            amount=order.total_amount_cents,
+            currency=order.currency,
             customer_id=customer_id,
             metadata={
                 "order_id": str(order.id),
@@ -356,6 +781,7 @@ def create_payment_intent(
         order.payment_intent_id = payment_intent["payment_intent_id"]
         order.stripe_customer_id = customer_id
         db.commit()
+        _mark_write(f"user:{current_user.id}")
         
         return {
             "client_secret": payment_intent["client_secret"],
@@ -374,6 +800,7 @@ def confirm_payment(
     """Confirm payment and update order status"""
     if PAYMENT_MODE != "stripe":
         raise HTTPException(status_code=400, detail="Stripe is disabled. Set PAYMENT_MODE=stripe to enable.")
+    stripe_service = get_stripe_service()
     if not stripe_service:
         raise HTTPException(status_code=500, detail="Payment service not available")
     
@@ -398,11 +825,13 @@ def confirm_payment(
         stripe_service.update_order_payment_status(
             db, order, payment_info["status"], payment_intent_id
         )
+        _mark_write(f"user:{current_user.id}")
         
         # Clear cart only if payment succeeded
         if payment_info.get("status") == "succeeded":
             db.query(models.CartItem).filter(models.CartItem.user_id == current_user.id).delete()
             db.commit()
+            cart_summary.invalidate(current_user.id)
         
         return {
             "order_id": order.id,
@@ -418,6 +847,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     """Handle Stripe webhook events"""
     if PAYMENT_MODE != "stripe":
         raise HTTPException(status_code=400, detail="Stripe is disabled. Set PAYMENT_MODE=stripe to enable.")
+    stripe_service = get_stripe_service()
     if not stripe_service:
         raise HTTPException(status_code=500, detail="Payment service not available")
     
@@ -440,9 +870,11 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
                 stripe_service.update_order_payment_status(
                     db, order, "succeeded", payment_intent['id']
                 )
+                _mark_write(f"user:{order.user_id}")
                 # Clear cart on successful payment via webhook
                 db.query(models.CartItem).filter(models.CartItem.user_id == order.user_id).delete()
                 db.commit()
+                cart_summary.invalidate(order.user_id)
         
         elif event['type'] == 'payment_intent.payment_failed':
             payment_intent = event['data']['object']
@@ -456,6 +888,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
                 stripe_service.update_order_payment_status(
                     db, order, "failed", payment_intent['id']
                 )
+                _mark_write(f"user:{order.user_id}")
         
         return {"status": "success"}
         
@@ -497,6 +930,9 @@ def mock_payment(
             
             db.commit()
             db.refresh(order)
+            cart_summary.invalidate(current_user.id)
+            _mark_write(f"user:{current_user.id}")
+            events.publish_order(order)
             
             return {
                 "status": "succeeded",
@@ -506,6 +942,8 @@ def mock_payment(
         else:
             order.payment_status = "failed"
             db.commit()
+            _mark_write(f"user:{current_user.id}")
+            events.publish_order(order)
             
             return {
                 "status": "failed",
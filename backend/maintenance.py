@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Periodic cleanup of abandoned carts and stale pending orders.
+
+- Carts not touched (no item added or changed) for ABANDONED_CART_TTL_HOURS
+  are deleted.
+- Orders still pending payment after PENDING_ORDER_TTL_HOURS are cancelled.
+
+Work happens in batches of MAINTENANCE_BATCH_SIZE, each in its own short
+transaction, so no run holds long locks on the hot tables. Each run reports
+how many rows it processed.
+
+The API runs this in a background thread when MAINTENANCE_INTERVAL_SECONDS
+is set; a lock in the shared state store makes sure only one worker per
+deployment runs it per interval. It can also be run from cron:
+
+    python maintenance.py --once
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import cart_summary
+import events
+import models
+import shared_state
+from database import SessionLocal
+
+ABANDONED_CART_TTL_HOURS = float(os.getenv("ABANDONED_CART_TTL_HOURS", "720"))
+PENDING_ORDER_TTL_HOURS = float(os.getenv("PENDING_ORDER_TTL_HOURS", "48"))
+MAINTENANCE_BATCH_SIZE = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))
+MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "0"))
+
+LOCK_KEY = "maintenance:lock"
+
+
+def expire_abandoned_carts(db: Session, ttl_hours: float = ABANDONED_CART_TTL_HOURS, batch_size: int = MAINTENANCE_BATCH_SIZE) -> int:
+    """Delete carts with no activity within the TTL; returns rows deleted"""
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    deleted = 0
+    while True:
+        user_ids = [
+            row[0] for row in db.query(models.CartItem.user_id)
+            .group_by(models.CartItem.user_id)
+            .having(func.max(models.CartItem.updated_at) < cutoff)
+            .limit(batch_size)
+            .all()
+        ]
+        if not user_ids:
+            return deleted
+        deleted += db.query(models.CartItem).filter(
+            models.CartItem.user_id.in_(user_ids),
+            models.CartItem.updated_at < cutoff,
+        ).delete(synchronize_session=False)
+        db.commit()
+        for user_id in user_ids:
+            cart_summary.invalidate(user_id)
+
+
+def cancel_stale_pending_orders(db: Session, ttl_hours: float = PENDING_ORDER_TTL_HOURS, batch_size: int = MAINTENANCE_BATCH_SIZE) -> int:
+    """Cancel orders still awaiting payment after the TTL; returns orders cancelled"""
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    stale = (
+        models.Order.status == "pending",
+        models.Order.payment_status != "succeeded",
+        models.Order.created_at < cutoff,
+    )
+    cancelled = 0
+    while True:
+        ids = [row[0] for row in db.query(models.Order.id).filter(*stale).order_by(models.Order.id).limit(batch_size).all()]
+        if not ids:
+            return cancelled
+        # Re-check the predicate so a payment that lands mid-batch wins
+        db.query(models.Order).filter(models.Order.id.in_(ids), *stale).update(
+            {"status": "cancelled", "payment_status": "canceled", "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+        db.commit()
+        for order in db.query(models.Order).filter(models.Order.id.in_(ids), models.Order.status == "cancelled"):
+            events.publish_order(order)
+            cancelled += 1
+        db.expunge_all()
+
+
+def run_once() -> dict:
+    """One maintenance pass; returns rows processed per task"""
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = {
+            "cart_items_expired": expire_abandoned_carts(db),
+            "orders_cancelled": cancel_stale_pending_orders(db),
+        }
+    finally:
+        db.close()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"Maintenance: {report}")
+    return report
+
+
+class MaintenanceWorker:
+    """Runs run_once() every interval in a daemon thread"""
+
+    def __init__(self, interval: int = MAINTENANCE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            # Only one process in the deployment runs each interval
+            if not shared_state.get_backend().set(LOCK_KEY, str(os.getpid()), ttl=self.interval * 0.9, nx=True):
+                continue
+            try:
+                run_once()
+            except Exception as e:
+                print(f"Warning: maintenance run failed: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expire abandoned carts and cancel stale pending orders")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=int, default=MAINTENANCE_INTERVAL_SECONDS or 3600)
+    args = parser.parse_args()
+
+    if args.once:
+        run_once()
+    else:
+        while True:
+            run_once()
+            time.sleep(args.interval)
@@ -0,0 +1,129 @@
+"""
+In-place upgrades for databases created by older versions of the app.
+
+create_all() only creates missing tables, so column changes to existing
+tables are applied here. Every step checks the live schema first and is
+safe to run on every start.
+"""
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
+
+import models
+from money import DEFAULT_CURRENCY
+
+# (table, old float column, new integer-cents column)
+_MONEY_COLUMNS = [
+    ("products", "price", "price_cents"),
+    ("orders", "total_amount", "total_amount_cents"),
+    ("order_items", "price", "price_cents"),
+]
+
+_CURRENCY_TABLES = ["products", "orders"]
+
+
+def _columns(conn, table):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def migrate_money_to_cents(conn):
+    """Replace float money columns with integer cents (rounded half away from zero)"""
+    for table, old, new in _MONEY_COLUMNS:
+        columns = _columns(conn, table)
+        if old not in columns:
+            continue
+        if new not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER"))
+        conn.execute(text(
+            f"UPDATE {table} SET {new} = CAST(ROUND({old} * 100) AS INTEGER) WHERE {new} IS NULL"
+        ))
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {old}"))
+        print(f"✅ Migrated {table}.{old} to {table}.{new}")
+    for table in _CURRENCY_TABLES:
+        if "currency" not in _columns(conn, table):
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN currency VARCHAR(3) NOT NULL DEFAULT '{DEFAULT_CURRENCY}'"
+            ))
+
+
+def merge_duplicate_cart_items(conn):
+    """Fold duplicate (user, product) cart rows together so the unique index can be built"""
+    if "uq_cart_items_user_product" in {i["name"] for i in inspect(conn).get_indexes("cart_items")}:
+        return
+    conn.execute(text(
+        "UPDATE cart_items SET quantity = ("
+        " SELECT SUM(c.quantity) FROM cart_items c"
+        " WHERE c.user_id = cart_items.user_id AND c.product_id = cart_items.product_id)"
+        " WHERE id IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id HAVING COUNT(*) > 1)"
+    ))
+    result = conn.execute(text(
+        "DELETE FROM cart_items WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id)"
+    ))
+    if result.rowcount:
+        print(f"✅ Merged {result.rowcount} duplicate cart rows")
+
+
+def add_order_snapshot(conn):
+    """Orders placed before snapshots existed keep NULL and are rebuilt from their items"""
+    if "snapshot" not in _columns(conn, "orders"):
+        conn.execute(text("ALTER TABLE orders ADD COLUMN snapshot JSON"))
+
+
+def add_cart_item_updated_at(conn):
+    """Track cart activity separately from creation; existing lines start from their creation time"""
+    if "updated_at" not in _columns(conn, "cart_items"):
+        conn.execute(text("ALTER TABLE cart_items ADD COLUMN updated_at TIMESTAMP"))
+        conn.execute(text("UPDATE cart_items SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)"))
+    # Superseded by ix_cart_items_user_id_updated_at
+    conn.execute(text("DROP INDEX IF EXISTS ix_cart_items_user_id_created_at"))
+
+
+def never_reuse_order_ids(conn):
+    """Rebuild SQLite orders with AUTOINCREMENT and start its sequence above every archived id
+
+    Without AUTOINCREMENT SQLite hands out max(id) + 1, so archiving the newest
+    orders would let their ids be reused. Postgres sequences never go back.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'orders'")).scalar()
+    if "AUTOINCREMENT" not in ddl.upper():
+        metadata = MetaData()
+        models.User.__table__.to_metadata(metadata)
+        rebuilt = models.Order.__table__.to_metadata(metadata, name="orders_rebuilt")
+        conn.execute(CreateTable(rebuilt))
+        columns = ", ".join(c.name for c in rebuilt.columns if c.name in _columns(conn, "orders"))
+        conn.execute(text(f"INSERT INTO orders_rebuilt ({columns}) SELECT {columns} FROM orders"))
+        # Indexes go with the old table; init_schema() recreates the declared ones
+        conn.execute(text("DROP TABLE orders"))
+        conn.execute(text("ALTER TABLE orders_rebuilt RENAME TO orders"))
+        print("✅ Rebuilt orders with AUTOINCREMENT ids")
+    if not inspect(conn).has_table("archived_order_index"):
+        return
+    highest = conn.execute(text(
+        "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM orders"
+        " UNION ALL SELECT MAX(order_id) FROM archived_order_index)"
+    )).scalar()
+    if highest is None:
+        return
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'orders' AND seq < :seq"), {"seq": highest})
+    conn.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', :seq"
+        " WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'orders')"
+    ), {"seq": highest})
+
+
+STEPS = [
+    migrate_money_to_cents,
+    merge_duplicate_cart_items,
+    add_order_snapshot,
+    add_cart_item_updated_at,
+    never_reuse_order_ids,
+]
+
+
+def upgrade(engine):
+    """Apply every pending step in one transaction"""
+    with engine.begin() as conn:
+        for step in STEPS:
+            step(conn)
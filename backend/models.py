@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
+from money import DEFAULT_CURRENCY, from_cents, to_cents
+
 Base = declarative_base()
 
 class User(Base):
@@ -25,7 +27,8 @@ class Product(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     description = Column(Text)
-    price = Column(Float, nullable=False)
+    price_cents = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)
     image_url = Column(String)
     category = Column(String, index=True)
     stock_quantity = Column(Integer, default=0)
@@ -36,14 +39,30 @@ class Product(Base):
     cart_items = relationship("CartItem", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
 
+    @property
+    def price(self):
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        self.price_cents = to_cents(value)
+
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # Cart lookups per user, and abandoned-cart expiry by last activity
+        Index("ix_cart_items_user_id_updated_at", "user_id", "updated_at"),
+        # One row per product; guest cart merges upsert against it
+        Index("uq_cart_items_user_product", "user_id", "product_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Last time the line was added to or changed; abandoned carts expire on it
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="cart_items")
@@ -51,15 +70,26 @@ class CartItem(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history per user, newest first
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        # Archival scans for finished orders past the cutoff
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Never hand out an id again once its order has been archived and deleted
+        {"sqlite_autoincrement": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    total_amount = Column(Float, nullable=False)
+    total_amount_cents = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)
     status = Column(String, default="pending")  # pending, confirmed, shipped, delivered, cancelled
     payment_status = Column(String, default="pending")  # pending, succeeded, failed, canceled
-    payment_intent_id = Column(String, nullable=True)  # Stripe payment intent ID
+    payment_intent_id = Column(String, nullable=True, index=True)  # Stripe payment intent ID
     stripe_customer_id = Column(String, nullable=True)  # Stripe customer ID
     shipping_address = Column(Text, nullable=False)
+    # Items and products as serialized at purchase; never updated afterwards
+    snapshot = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -67,15 +97,31 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order")
 
+    @property
+    def total_amount(self):
+        return from_cents(self.total_amount_cents)
+
+    @total_amount.setter
+    def total_amount(self, value):
+        self.total_amount_cents = to_cents(value)
+
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
-    price = Column(Float, nullable=False)  # Price at the time of order
+    price_cents = Column(Integer, nullable=False)  # Price at the time of order
     
     # Relationships
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
+
+    @property
+    def price(self):
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        self.price_cents = to_cents(value)
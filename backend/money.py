@@ -0,0 +1,27 @@
+"""
+Money helpers.
+
+Amounts are stored as integer minor units (cents) alongside an ISO 4217
+currency code, so sums in SQL are exact and nothing drifts through floats.
+Decimal is used at the edges (API input/output, Stripe).
+"""
+
+import os
+from decimal import Decimal, ROUND_HALF_UP
+
+DEFAULT_CURRENCY = os.getenv("CURRENCY", "usd").lower()
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(amount) -> int:
+    """Convert a major-unit amount (Decimal, str, int or float) to integer cents"""
+    if isinstance(amount, float):
+        # Go through repr so 19.99 means Decimal("19.99"), not its binary expansion
+        amount = repr(amount)
+    return int((Decimal(amount) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents to an exact major-unit Decimal"""
+    return (Decimal(cents) / 100).quantize(_CENT)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Month-partitioned cold storage for finished orders.
+
+Delivered and cancelled orders older than a cutoff are moved out of the hot
+`orders`/`order_items` tables into `archived_orders`, one partition per
+month of `created_at`:
+
+- PostgreSQL: a native RANGE-partitioned `archived_orders` table with
+  `archived_orders_YYYYMM` partitions created on demand
+- other databases (SQLite): one plain `archived_orders_YYYYMM` table per month
+
+Each archived row holds the serialized order (items and products as they
+were when archived) as zlib-compressed JSON. `archived_order_index` maps
+order ids to their partition so history reads can find them without
+scanning every month.
+
+Usage:
+    python order_archive.py [--older-than-days 365] [--batch-size 500]
+"""
+
+import argparse
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, MetaData, String, Table, select, text
+from sqlalchemy.orm import Session, selectinload
+
+import models
+import schemas
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVABLE_STATUSES = ("delivered", "cancelled")
+
+archive_metadata = MetaData()
+
+archived_order_index = Table(
+    "archived_order_index",
+    archive_metadata,
+    Column("order_id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False, index=True),
+    Column("period", String(6), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def _archive_columns():
+    return [
+        Column("order_id", Integer, primary_key=True),
+        # Part of the key so Postgres can partition on it
+        Column("created_at", DateTime, primary_key=True),
+        Column("user_id", Integer, nullable=False),
+        Column("status", String, nullable=False),
+        Column("payload", LargeBinary, nullable=False),
+    ]
+
+
+archived_orders = Table(
+    "archived_orders",
+    archive_metadata,
+    *_archive_columns(),
+    postgresql_partition_by="RANGE (created_at)",
+)
+
+
+def period_of(dt: datetime) -> str:
+    return f"{dt.year:04d}{dt.month:02d}"
+
+
+def period_bounds(period: str):
+    start = datetime(int(period[:4]), int(period[4:]), 1)
+    end = datetime(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return start, end
+
+
+def _native(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _period_table(period: str) -> Table:
+    """Per-month table used where native partitioning is unavailable"""
+    name = f"archived_orders_{period}"
+    if name in archive_metadata.tables:
+        return archive_metadata.tables[name]
+    return Table(name, archive_metadata, *_archive_columns())
+
+
+def _table_for(db: Session, period: str) -> Table:
+    # On Postgres the parent routes rows and prunes partitions itself
+    return archived_orders if _native(db) else _period_table(period)
+
+
+def create_archive_tables(bind) -> None:
+    """Create the index table and, on Postgres, the partitioned parent"""
+    archived_order_index.create(bind=bind, checkfirst=True)
+    if bind.dialect.name == "postgresql":
+        archived_orders.create(bind=bind, checkfirst=True)
+
+
+def ensure_partitions(db: Session, periods) -> None:
+    """Create any missing month partitions (or per-month tables)"""
+    if _native(db):
+        for period in periods:
+            start, end = period_bounds(period)
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS archived_orders_{period} PARTITION OF archived_orders "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+    else:
+        for period in periods:
+            _period_table(period).create(bind=db.connection(), checkfirst=True)
+
+
+def _compress(order: models.Order) -> bytes:
+    data = schemas.OrderResponse.model_validate(order).model_dump(mode="json")
+    if order.snapshot is not None:
+        # Keep the products as they were at purchase, not as they are now
+        data["order_items"] = order.snapshot["order_items"]
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def _decompress(payload: bytes) -> dict:
+    return json.loads(zlib.decompress(payload))
+
+
+def archive_orders(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = 500) -> int:
+    """Move finished orders older than the cutoff to cold storage; returns how many moved"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+    while True:
+        orders = (
+            db.query(models.Order)
+            .options(selectinload(models.Order.order_items).joinedload(models.OrderItem.product))
+            .filter(models.Order.status.in_(ARCHIVABLE_STATUSES), models.Order.created_at < cutoff)
+            .order_by(models.Order.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not orders:
+            return moved
+
+        periods = sorted({period_of(o.created_at) for o in orders})
+        ensure_partitions(db, periods)
+        for period in periods:
+            rows = [
+                {
+                    "order_id": o.id,
+                    "created_at": o.created_at,
+                    "user_id": o.user_id,
+                    "status": o.status,
+                    "payload": _compress(o),
+                }
+                for o in orders if period_of(o.created_at) == period
+            ]
+            db.execute(_table_for(db, period).insert(), rows)
+            db.execute(archived_order_index.insert(), [
+                {"order_id": r["order_id"], "user_id": r["user_id"], "period": period, "created_at": r["created_at"]}
+                for r in rows
+            ])
+
+        ids = [o.id for o in orders]
+        db.query(models.OrderItem).filter(models.OrderItem.order_id.in_(ids)).delete(synchronize_session=False)
+        db.query(models.Order).filter(models.Order.id.in_(ids)).delete(synchronize_session=False)
+        # One transaction per batch keeps locks short
+        db.commit()
+        db.expunge_all()
+        moved += len(ids)
+
+
+def load_archived_order(db: Session, order_id: int, user_id: int) -> Optional[dict]:
+    """Fetch one archived order for a user, or None"""
+    entry = db.execute(
+        archived_order_index.select().where(
+            archived_order_index.c.order_id == order_id,
+            archived_order_index.c.user_id == user_id,
+        )
+    ).first()
+    if entry is None:
+        return None
+    table = _table_for(db, entry.period)
+    payload = db.execute(
+        table.select().with_only_columns(table.c.payload).where(
+            table.c.order_id == order_id,
+            table.c.created_at == entry.created_at,
+        )
+    ).scalar()
+    return _decompress(payload) if payload is not None else None
+
+
+def load_archived_orders(db: Session, user_id: int) -> List[dict]:
+    """All archived orders of a user, oldest first"""
+    entries = db.execute(
+        archived_order_index.select()
+        .where(archived_order_index.c.user_id == user_id)
+        .order_by(archived_order_index.c.created_at)
+    ).all()
+    orders = []
+    for period in sorted({e.period for e in entries}):
+        table = _table_for(db, period)
+        ids = [e.order_id for e in entries if e.period == period]
+        start, end = period_bounds(period)
+        rows = db.execute(
+            table.select().with_only_columns(table.c.payload).where(
+                table.c.order_id.in_(ids),
+                table.c.created_at >= start,
+                table.c.created_at < end,
+            ).order_by(table.c.created_at)
+        ).scalars()
+        orders.extend(_decompress(p) for p in rows)
+    return orders
+
+
+def iter_archived_items(db: Session) -> Iterator[Tuple[int, int]]:
+    """(order_id, product_id) for every item of every paid archived order, month by month"""
+    periods = db.execute(select(archived_order_index.c.period).distinct()).scalars().all()
+    for period in sorted(periods):
+        table = _table_for(db, period)
+        start, end = period_bounds(period)
+        rows = db.execute(
+            table.select().with_only_columns(table.c.order_id, table.c.payload).where(
+                table.c.created_at >= start,
+                table.c.created_at < end,
+            )
+        )
+        for order_id, payload in rows:
+            order = _decompress(payload)
+            if order.get("payment_status") != "succeeded":
+                continue
+            for item in order["order_items"]:
+                yield order_id, item["product_id"]
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Move finished orders to month-partitioned cold storage")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        moved = archive_orders(db, args.older_than_days, args.batch_size)
+        print(f"✅ Archived {moved} orders older than {args.older_than_days} days")
+    finally:
+        db.close()
@@ -15,7 +15,7 @@ class OrderSchema(pw.Schema):
     user_id: int
     product_id: int
     quantity: int
-    price: float
+    price_cents: int  # integer minor units, as stored in the database
     timestamp: int
 
 class ProductSchema(pw.Schema):
@@ -28,11 +28,11 @@ def create_sample_data():
     """Create sample data for demonstration"""
     # Sample order data
     orders_data = pw.debug.table_from_markdown("""
-    | order_id | user_id | product_id | quantity | price | timestamp
-    1 | 1001     | 101     | 501        | 2        | 29.99 | 1640995200
-    2 | 1002     | 102     | 502        | 1        | 49.99 | 1640995260
-    3 | 1003     | 101     | 503        | 3        | 19.99 | 1640995320
-    4 | 1004     | 103     | 501        | 1        | 29.99 | 1640995380
+    | order_id | user_id | product_id | quantity | price_cents | timestamp
+    1 | 1001     | 101     | 501        | 2        | 2999        | 1640995200
+    2 | 1002     | 102     | 502        | 1        | 4999        | 1640995260
+    3 | 1003     | 101     | 503        | 3        | 1999        | 1640995320
+    4 | 1004     | 103     | 501        | 1        | 2999        | 1640995380
     """)
     
     # Sample product data
@@ -48,10 +48,13 @@ def create_sample_data():
 def analyze_sales_data(orders, products):
     """Perform real-time analytics on sales data"""
     
+    # Revenue is summed in integer cents, so totals are exact
+    line_total_cents = orders.price_cents * orders.quantity
+    
     # Calculate total revenue per user
     user_revenue = orders.groupby(orders.user_id).reduce(
         user_id=orders.user_id,
-        total_revenue=pw.reducers.sum(orders.price * orders.quantity),
+        total_revenue_cents=pw.reducers.sum(line_total_cents),
         total_orders=pw.reducers.count()
     )
     
@@ -59,15 +62,15 @@ def analyze_sales_data(orders, products):
     product_stats = orders.groupby(orders.product_id).reduce(
         product_id=orders.product_id,
         total_quantity_sold=pw.reducers.sum(orders.quantity),
-        total_revenue=pw.reducers.sum(orders.price * orders.quantity),
+        total_revenue_cents=pw.reducers.sum(line_total_cents),
         order_count=pw.reducers.count()
     )
     
     # Calculate total sales metrics
     total_metrics = orders.reduce(
         total_orders=pw.reducers.count(),
-        total_revenue=pw.reducers.sum(orders.price * orders.quantity),
-        avg_order_value=pw.reducers.avg(orders.price * orders.quantity)
+        total_revenue_cents=pw.reducers.sum(line_total_cents),
+        avg_order_value_cents=pw.reducers.avg(line_total_cents)
     )
     
     return user_revenue, product_stats, total_metrics
@@ -0,0 +1,50 @@
+"""
+Per-product cache for catalog reads.
+
+Serialized products are kept in the shared state store, one entry per
+product and locale, under the catalog version so any product write retires
+them. A lookup fetches every requested entry in one round trip and loads
+only the misses from the database, in a single IN query.
+"""
+
+import json
+import os
+from typing import Callable, Dict, List
+
+from sqlalchemy.orm import Session
+
+import http_cache
+import models
+import schemas
+import shared_state
+
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", "300"))
+
+
+def _key(version: int, locale: str, product_id: int) -> str:
+    return f"product:{version}:{locale}:{product_id}"
+
+
+def get_many(db: Session, product_ids: List[int], locale: str, serialize: Callable) -> Dict[int, dict]:
+    """
+    JSON-ready products by id for the given locale; ids that don't exist are
+    left out. `serialize(product, locale)` renders a product on a miss.
+    """
+    ids = list(dict.fromkeys(product_ids))
+    if not ids:
+        return {}
+    backend = shared_state.get_backend()
+    version = http_cache.catalog_version.version
+    cached = backend.get_many([_key(version, locale, pid) for pid in ids])
+    found = {pid: json.loads(value) for pid, value in zip(ids, cached) if value is not None}
+
+    missing = [pid for pid in ids if pid not in found]
+    if missing:
+        loaded = {}
+        for product in db.query(models.Product).filter(models.Product.id.in_(missing)):
+            data = schemas.ProductResponse.model_validate(serialize(product, locale)).model_dump(mode="json")
+            found[product.id] = data
+            loaded[_key(version, locale, product.id)] = json.dumps(data)
+        if loaded:
+            backend.set_many(loaded, ttl=PRODUCT_CACHE_TTL)
+    return found
@@ -0,0 +1,67 @@
+"""
+Sliding-window rate limiting backed by the shared state store.
+
+Limiters are FastAPI dependencies. Attach them through the route's
+`dependencies=[...]` so they run before any other dependency, which means
+rejected requests never reach bcrypt, the JWT lookup or the database.
+"""
+
+import math
+import os
+from typing import Callable, Tuple
+
+import jwt
+from fastapi import HTTPException, Request
+
+import shared_state
+
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """Parse a "<requests>/<seconds>" limit such as "10/60" """
+    count, _, seconds = value.partition("/")
+    return int(count), float(seconds or 60)
+
+
+def client_ip(request: Request) -> str:
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and os.getenv("TRUST_PROXY_HEADERS", "").lower() in ("1", "true", "yes"):
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def user_or_ip(request: Request) -> str:
+    """
+    Key by user id when the bearer token verifies, by IP otherwise. Checking
+    the signature costs one HMAC and no database access. Unverified tokens
+    must not pick the key, or every made-up token would get a fresh window.
+    """
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(auth[7:], os.getenv("SECRET_KEY", "your-secret-key-here"), algorithms=["HS256"])
+            if payload.get("sub") is not None:
+                return f"user:{payload['sub']}"
+        except jwt.PyJWTError:
+            pass
+    return "ip:" + client_ip(request)
+
+
+class RateLimiter:
+    def __init__(self, name: str, rate: str, key_func: Callable[[Request], str] = client_ip):
+        self.name = name
+        self.limit, self.window = parse_rate(rate)
+        self.key_func = key_func
+
+    def __call__(self, request: Request) -> None:
+        key = f"ratelimit:{self.name}:{self.key_func(request)}"
+        allowed, retry_after = shared_state.get_backend().hit(key, self.limit, self.window)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+login_rate_limit = RateLimiter("login", os.getenv("LOGIN_RATE_LIMIT", "10/60"))
+cart_rate_limit = RateLimiter("cart", os.getenv("CART_RATE_LIMIT", "60/60"), key_func=user_or_ip)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+"Frequently bought together" recommendations.
+
+An offline job turns the items of paid orders into a sparse order x product
+matrix M and computes the item-item co-purchase matrix C = M^T M with SciPy.
+Scores are cosine-normalized (C_ij / sqrt(C_ii * C_jj)) so best-sellers
+don't dominate every list. The top-K neighbours of every product are written as two dense
+.npy arrays indexed by product id:
+
+- neighbors.npy  int32   (n_products, K), -1 padded
+- scores.npy     float32 (n_products, K)
+
+The API memory-maps them, so a lookup is a single row slice.
+
+A full build also reads archived orders, whose order_items rows have been
+deleted. With --incremental only orders created since the last build are
+folded into the saved co-occurrence counts. Progress is tracked by
+created_at minus an overlap window, so orders that commit or are paid late
+are still picked up. Orders already counted within the window are skipped by id.
+
+Usage:
+    python recommendations.py [--incremental] [--top-k 20]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+import order_archive
+
+RECOMMENDATIONS_DIR = os.getenv("RECOMMENDATIONS_DIR", "./recommendations")
+TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "20"))
+# Orders may commit or be paid up to this long after their created_at and still be counted
+OVERLAP = timedelta(minutes=int(os.getenv("RECOMMENDATIONS_OVERLAP_MINUTES", "60")))
+
+NEIGHBORS_FILE = "neighbors.npy"
+SCORES_FILE = "scores.npy"
+COOCCURRENCE_FILE = "cooccurrence.npz"
+STATE_FILE = "state.json"
+
+
+def _load_pairs(db: Session, since=None, seen=()):
+    """
+    Items of paid live orders created at or after `since` (all if None), skipping
+    order ids in `seen`. Returns order ids, product ids and {order_id: created_at}.
+    """
+    query = (
+        select(models.OrderItem.order_id, models.OrderItem.product_id, models.Order.created_at)
+        .join(models.Order, models.Order.id == models.OrderItem.order_id)
+        .where(models.Order.payment_status == "succeeded")
+    )
+    if since is not None:
+        query = query.where(models.Order.created_at >= since)
+    rows = [r for r in db.execute(query) if r[0] not in seen]
+    orders = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    products = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    created = {r[0]: r[2] for r in rows if r[2] is not None}
+    return orders, products, created
+
+
+def _load_archived_pairs(db: Session):
+    pairs = list(order_archive.iter_archived_items(db))
+    orders = np.fromiter((p[0] for p in pairs), dtype=np.int64, count=len(pairs))
+    products = np.fromiter((p[1] for p in pairs), dtype=np.int64, count=len(pairs))
+    return orders, products
+
+
+def cooccurrence(orders: np.ndarray, products: np.ndarray, n_products: int) -> sparse.csr_matrix:
+    """Item-item co-purchase counts; the diagonal holds orders per item"""
+    if orders.size == 0:
+        return sparse.csr_matrix((n_products, n_products), dtype=np.int64)
+    _, order_rows = np.unique(orders, return_inverse=True)
+    basket = sparse.csr_matrix(
+        (np.ones(orders.size, dtype=np.int64), (order_rows, products)),
+        shape=(order_rows.max() + 1, n_products),
+    )
+    # An item listed twice in one order still counts once
+    basket.sum_duplicates()
+    basket.data[:] = 1
+    return (basket.T @ basket).tocsr()
+
+
+def _resize(matrix: sparse.csr_matrix, n: int) -> sparse.csr_matrix:
+    if matrix.shape[0] == n:
+        return matrix
+    matrix = matrix.tocoo()
+    return sparse.csr_matrix((matrix.data, (matrix.row, matrix.col)), shape=(n, n))
+
+
+def top_k(counts: sparse.csr_matrix, k: int):
+    """Top-k neighbours per row by cosine score, fully vectorized"""
+    n = counts.shape[0]
+    diag = counts.diagonal().astype(np.float64)
+    coo = counts.tocoo()
+    off = coo.row != coo.col
+    rows, cols = coo.row[off], coo.col[off]
+    scores = coo.data[off] / np.sqrt(diag[rows] * diag[cols])
+
+    # Sort by row, then by descending score; rank within each row
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    row_start = np.searchsorted(rows, np.arange(n))
+    rank = np.arange(rows.size) - row_start[rows]
+    keep = rank < k
+
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    top_scores = np.zeros((n, k), dtype=np.float32)
+    neighbors[rows[keep], rank[keep]] = cols[keep]
+    top_scores[rows[keep], rank[keep]] = scores[keep]
+    return neighbors, top_scores
+
+
+def _save_array(directory: str, name: str, array: np.ndarray):
+    # Write then rename, so readers never map a half-written file
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npy")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, os.path.join(directory, name))
+
+
+def build_index(db: Session, directory: str = RECOMMENDATIONS_DIR, k: int = TOP_K, incremental: bool = False) -> dict:
+    """Build (or incrementally update) the on-disk index; returns the new state"""
+    os.makedirs(directory, exist_ok=True)
+    state_path = os.path.join(directory, STATE_FILE)
+    counts_path = os.path.join(directory, COOCCURRENCE_FILE)
+
+    since = None
+    seen = {}
+    previous = None
+    if incremental and os.path.exists(state_path) and os.path.exists(counts_path):
+        with open(state_path) as f:
+            saved = json.load(f)
+        if "recent_orders" in saved:
+            since = datetime.fromisoformat(saved["watermark"]) if saved["watermark"] else None
+            seen = {int(oid): datetime.fromisoformat(ts) for oid, ts in saved["recent_orders"].items()}
+            previous = sparse.load_npz(counts_path).tocsr()
+        else:
+            print("Index state predates created_at tracking; doing a full rebuild")
+
+    orders, products, created = _load_pairs(db, since, seen)
+    if previous is None:
+        # Archived orders no longer have order_items rows; read them from cold storage
+        archived_orders, archived_products = _load_archived_pairs(db)
+        orders = np.concatenate([orders, archived_orders])
+        products = np.concatenate([products, archived_products])
+    max_product_id = db.execute(select(models.Product.id).order_by(models.Product.id.desc()).limit(1)).scalar() or 0
+    n = max(max_product_id + 1, int(products.max()) + 1 if products.size else 0,
+            previous.shape[0] if previous is not None else 0)
+
+    counts = cooccurrence(orders, products, n)
+    if previous is not None:
+        counts = counts + _resize(previous, n)
+
+    neighbors, scores = top_k(counts, k)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz")
+    os.close(fd)
+    sparse.save_npz(tmp, counts)
+    os.replace(tmp, counts_path)
+    _save_array(directory, NEIGHBORS_FILE, neighbors)
+    _save_array(directory, SCORES_FILE, scores)
+
+    # Remember the orders inside the overlap window so the next run skips them
+    counted = {**seen, **created}
+    watermark = max(counted.values()) - OVERLAP if counted else since
+    state = {
+        "watermark": watermark.isoformat() if watermark else None,
+        "recent_orders": {str(oid): ts.isoformat() for oid, ts in counted.items() if ts >= watermark},
+        "built_at": time.time(),
+        "products": n,
+        "top_k": k,
+    }
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path)
+    return state
+
+
+class RelatedIndex:
+    """Memory-mapped read side of the index, reloaded when a new build lands"""
+
+    RELOAD_CHECK_INTERVAL = 5.0
+
+    def __init__(self, directory: str = RECOMMENDATIONS_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._neighbors = None
+        self._stamp = None
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.RELOAD_CHECK_INTERVAL and self._stamp is not None:
+            return
+        with self._lock:
+            self._checked_at = now
+            state_path = os.path.join(self.directory, STATE_FILE)
+            try:
+                stamp = os.stat(state_path).st_mtime_ns
+            except FileNotFoundError:
+                self._neighbors, self._stamp = None, None
+                return
+            if stamp != self._stamp:
+                self._neighbors = np.load(os.path.join(self.directory, NEIGHBORS_FILE), mmap_mode="r")
+                self._stamp = stamp
+
+    def related(self, product_id: int, limit: int = 10) -> List[int]:
+        """Ids of the products most often bought with `product_id`, best first"""
+        self._refresh()
+        neighbors = self._neighbors
+        if neighbors is None or product_id < 0 or product_id >= neighbors.shape[0]:
+            return []
+        row = neighbors[product_id, :limit]
+        return [int(pid) for pid in row if pid >= 0]
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build the frequently-bought-together index")
+    parser.add_argument("--incremental", action="store_true", help="only fold in orders since the last build")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--dir", default=RECOMMENDATIONS_DIR)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        state = build_index(db, args.dir, args.top_k, args.incremental)
+        print(f"✅ Built recommendations for {state['products']} products "
+              f"in {time.perf_counter() - started:.2f}s (orders up to {state['watermark']} settled)")
+    finally:
+        db.close()
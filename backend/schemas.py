@@ -1,6 +1,13 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, PlainSerializer, field_validator
 from typing import List, Optional
+from typing_extensions import Annotated
 from datetime import datetime
+from decimal import Decimal
+
+from money import DEFAULT_CURRENCY
+
+# Exact Decimal in Python; a plain JSON number on the wire for existing clients
+Money = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
 
 # User schemas
 class UserBase(BaseModel):
@@ -25,16 +32,24 @@ class UserResponse(UserBase):
 class ProductBase(BaseModel):
     name: str
     description: Optional[str] = None
-    price: float
+    price: Money
+    currency: str = DEFAULT_CURRENCY
     image_url: Optional[str] = None
     category: Optional[str] = None
     stock_quantity: int = 0
 
 class ProductCreate(ProductBase):
-    pass
+    @field_validator("currency")
+    @classmethod
+    def single_currency(cls, value: str) -> str:
+        # Orders, cart totals and Stripe charges are all in the store currency
+        if value.lower() != DEFAULT_CURRENCY:
+            raise ValueError(f"currency must be {DEFAULT_CURRENCY}")
+        return DEFAULT_CURRENCY
 
 class ProductResponse(ProductBase):
     id: int
+    price_cents: int
     is_active: bool
     created_at: datetime
     
@@ -58,32 +73,70 @@ class CartItemResponse(CartItemBase):
     class Config:
         from_attributes = True
 
+class GuestCartItem(BaseModel):
+    product_id: int
+    quantity: int
+
+class GuestCartResponse(BaseModel):
+    items: List[GuestCartItem]
+    item_count: int
+    token: str
+
+class CartSummaryLine(BaseModel):
+    cart_item_id: int
+    product_id: int
+    name: str
+    quantity: int
+    unit_price: Money
+    unit_price_cents: int
+    line_total: Money
+    line_total_cents: int
+    stock_quantity: int
+    in_stock: bool
+
+class CartSummaryResponse(BaseModel):
+    items: List[CartSummaryLine]
+    item_count: int
+    subtotal: Money
+    subtotal_cents: int
+    currency: str
+    all_in_stock: bool
+
 # Order schemas
 class OrderItemBase(BaseModel):
     product_id: int
     quantity: int
-    price: float
+    price: Money
 
-class OrderItemCreate(OrderItemBase):
-    pass
+class OrderItemCreate(BaseModel):
+    product_id: int
+    quantity: int
+    # Ignored: items are priced from the catalog; kept optional for older clients
+    price: Optional[Money] = None
 
 class OrderItemResponse(OrderItemBase):
     id: int
+    price_cents: int
     product: ProductResponse
     
     class Config:
         from_attributes = True
 
 class OrderBase(BaseModel):
-    total_amount: float
+    total_amount: Money
     shipping_address: str
 
-class OrderCreate(OrderBase):
+class OrderCreate(BaseModel):
+    shipping_address: str
     items: List[OrderItemCreate]
+    # Ignored: the total is computed from the priced items; kept optional for older clients
+    total_amount: Optional[Money] = None
 
 class OrderResponse(OrderBase):
     id: int
     user_id: int
+    total_amount_cents: int
+    currency: str
     status: str
     payment_status: str = "pending"
     payment_intent_id: Optional[str] = None
@@ -0,0 +1,294 @@
+"""
+Shared state backend for caches, invalidation and rate limiting.
+
+Anything that has to agree across uvicorn workers or containers (catalog
+version, cached values, throttles) goes through a SharedStateBackend:
+
+- RedisBackend: used when SHARED_STATE_URL points at a Redis-compatible
+  server (redis://, rediss://, unix://)
+- InMemoryBackend: per-process fallback for local development and tests
+"""
+
+import fnmatch
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "")
+KEY_PREFIX = os.getenv("SHARED_STATE_PREFIX", "ecommerce:")
+
+
+class SharedStateBackend:
+    """Interface every shared state backend implements"""
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """Store a value; with nx=True only if the key is absent. Returns whether it was stored"""
+        raise NotImplementedError
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """Values for several keys in one round trip, None where missing"""
+        raise NotImplementedError
+
+    def set_many(self, values: Dict[str, str], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def publish(self, channel: str, message: str) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        """Call `callback(message)` for every message published on `channel`"""
+        raise NotImplementedError
+
+    def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        """
+        Record a hit in a sliding window of `window` seconds.
+        Returns (allowed, retry_after_seconds); rejected hits are not recorded.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(SharedStateBackend):
+    """Process-local backend; state is not shared between workers"""
+
+    # Expired values and idle rate-limit windows are swept this often
+    SWEEP_INTERVAL = 10.0
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._values: Dict[str, Tuple[str, Optional[float]]] = {}
+        # key -> (window seconds, hit timestamps)
+        self._windows: Dict[str, Tuple[float, deque]] = {}
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+        self._swept_at = time.monotonic()
+
+    def _sweep(self, now: float):
+        # Keys that are never read again (old cache versions, one-off
+        # rate-limit keys) would otherwise stay in memory forever
+        if now - self._swept_at < self.SWEEP_INTERVAL:
+            return
+        self._swept_at = now
+        for key in [k for k, (_, expires_at) in self._values.items() if expires_at is not None and expires_at <= now]:
+            del self._values[key]
+        for key in [k for k, (window, hits) in self._windows.items() if not hits or hits[-1] <= now - window]:
+            del self._windows[key]
+
+    def _live(self, key: str):
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key, value, ttl=None, nx=False):
+        with self._lock:
+            self._sweep(time.monotonic())
+            if nx and self._live(key) is not None:
+                return False
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._values[key] = (str(value), expires_at)
+            return True
+
+    def get_many(self, keys):
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def set_many(self, values, ttl=None):
+        with self._lock:
+            self._sweep(time.monotonic())
+            expires_at = time.monotonic() + ttl if ttl else None
+            for key, value in values.items():
+                self._values[key] = (str(value), expires_at)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            expires_at = self._values.get(key, (None, None))[1]
+            self._values[key] = (str(value), expires_at)
+            return value
+
+    def publish(self, channel, message):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, []))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            hits = self._windows.setdefault(key, (window, deque()))[1]
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return False, hits[0] + window - now
+            hits.append(now)
+            return True, 0.0
+
+    def clear(self, pattern: str = "*") -> None:
+        """Drop matching keys and rate-limit windows (handy between tests)"""
+        with self._lock:
+            for store in (self._values, self._windows):
+                for key in [k for k in store if fnmatch.fnmatch(k, pattern)]:
+                    del store[key]
+
+
+# Sliding-window log kept in a sorted set; evaluated atomically server-side
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+  redis.call('ZADD', KEYS[1], now, ARGV[4])
+  redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+  return {1, '0'}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, tostring(tonumber(oldest[2]) + window - now)}
+"""
+
+
+class RedisBackend(SharedStateBackend):
+    """Backend for any Redis-protocol server (Redis, Valkey, KeyDB, ...)"""
+
+    def __init__(self, url: str, prefix: str = KEY_PREFIX):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self._sliding_window = self._redis.register_script(_SLIDING_WINDOW_SCRIPT)
+        self._pubsub = None
+        self._pubsub_thread = None
+        self._callbacks: Dict[str, List[Callable[[str], None]]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    def get(self, key):
+        return self._redis.get(self._key(key))
+
+    def set(self, key, value, ttl=None, nx=False):
+        px = int(ttl * 1000) if ttl else None
+        return bool(self._redis.set(self._key(key), value, px=px, nx=nx))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return self._redis.mget([self._key(k) for k in keys])
+
+    def set_many(self, values, ttl=None):
+        px = int(ttl * 1000) if ttl else None
+        pipe = self._redis.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(self._key(key), value, px=px)
+        pipe.execute()
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*[self._key(k) for k in keys])
+
+    def incr(self, key):
+        return int(self._redis.incr(self._key(key)))
+
+    def publish(self, channel, message):
+        self._redis.publish(self._key(channel), message)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            first = channel not in self._callbacks
+            self._callbacks.setdefault(channel, []).append(callback)
+            if not first:
+                return
+            if self._pubsub is None:
+                self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self._key(channel): self._dispatch})
+            if self._pubsub_thread is None:
+                self._pubsub_thread = self._pubsub.run_in_thread(
+                    sleep_time=1.0, daemon=True, exception_handler=self._on_listener_error
+                )
+
+    def _on_listener_error(self, error, pubsub, thread):
+        # Without a handler redis-py lets the error kill the listener thread
+        print(f"Warning: shared state listener lost its connection ({error!r}); resubscribing")
+        time.sleep(1.0)
+        try:
+            pubsub.connection.disconnect()
+            # The pubsub's connect callback re-subscribes every channel
+            pubsub.connection.connect()
+        except Exception as e:
+            print(f"Warning: shared state resubscribe failed: {e}")
+
+    def _dispatch(self, message):
+        channel = message["channel"][len(self._prefix):]
+        for callback in list(self._callbacks.get(channel, [])):
+            try:
+                callback(message["data"])
+            except Exception as e:
+                print(f"Warning: shared state subscriber for {channel!r} failed: {e}")
+
+    def hit(self, key, limit, window):
+        allowed, retry_after = self._sliding_window(
+            keys=[self._key(key)],
+            args=[time.time(), window, limit, uuid.uuid4().hex],
+        )
+        return bool(allowed), float(retry_after)
+
+
+_backend: Optional[SharedStateBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(url: str = SHARED_STATE_URL) -> SharedStateBackend:
+    """Build a backend from a URL; an empty URL selects the in-process backend"""
+    if not url or url == "memory://":
+        return InMemoryBackend()
+    try:
+        return RedisBackend(url)
+    except ImportError:
+        print("Warning: SHARED_STATE_URL is set but the redis package is not installed; using in-process state")
+        return InMemoryBackend()
+
+
+def get_backend() -> SharedStateBackend:
+    """The process-wide backend, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: SharedStateBackend) -> None:
+    """Swap the process-wide backend (e.g. an InMemoryBackend in tests)"""
+    global _backend
+    _backend = backend
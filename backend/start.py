@@ -4,8 +4,7 @@ Startup script for the ecommerce backend.
 This script initializes the database and creates some sample data.
 """
 
-from database import SessionLocal, engine
-import models
+from database import SessionLocal, init_schema
 from models import User, Product
 import bcrypt
 
@@ -97,7 +96,7 @@ if __name__ == "__main__":
     print("🚀 Initializing ecommerce database...")
     
     # Create all tables
-    models.Base.metadata.create_all(bind=engine)
+    init_schema()
     print("✅ Database tables created")
     
     # Create sample data
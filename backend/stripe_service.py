@@ -4,6 +4,7 @@ from typing import Dict, Any
 from fastapi import HTTPException
 from models import Order, User
 from sqlalchemy.orm import Session
+import events
 
 # Initialize Stripe
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
@@ -108,4 +109,5 @@ class StripeService:
         
         db.commit()
         db.refresh(order)
+        events.publish_order(order)
         return order
@@ -2,7 +2,7 @@
 
 import { useQuery, useMutation, useQueryClient } from 'react-query'
 import { api } from '@/lib/api'
-import { CartItem } from '@/types'
+import { CartItem, GuestCart, Product } from '@/types'
 import { useAuthStore } from '@/store/authStore'
 import { Trash2, Plus, Minus } from 'lucide-react'
 import Image from 'next/image'
@@ -23,7 +23,7 @@ export default function CartPage() {
     { style: 'currency', currency }
   )
   
-  const { data: cartItems, isLoading } = useQuery<CartItem[]>(
+  const { data: accountItems, isLoading: accountLoading } = useQuery<CartItem[]>(
     'cart',
     api.getCart,
     {
@@ -31,19 +31,52 @@ export default function CartPage() {
     }
   )
 
-  const removeItemMutation = useMutation(api.removeFromCart, {
-    onSuccess: () => {
-      queryClient.invalidateQueries('cart')
-      toast.success(t('cart.itemRemoved'))
-    },
-    onError: (error: any) => {
-      toast.error(error.response?.data?.detail || t('cart.removeFailed'))
-    },
-  })
+  // Guests: the signed cart token holds ids and quantities, products are fetched in one batch
+  const { data: guestCart, isLoading: guestLoading } = useQuery<GuestCart>(
+    ['cart', 'guest'],
+    api.getGuestCart,
+    {
+      enabled: !isAuthenticated,
+    }
+  )
+  const guestIds = guestCart?.items.map(item => item.product_id) || []
+  const { data: guestProducts, isLoading: guestProductsLoading } = useQuery<Product[]>(
+    ['cart', 'guest', 'products', guestIds.join(',')],
+    () => api.getProductsByIds(guestIds),
+    {
+      enabled: !isAuthenticated && guestIds.length > 0,
+    }
+  )
+
+  type CartLine = Pick<CartItem, 'id' | 'product_id' | 'quantity' | 'product'>
+  const cartItems: CartLine[] | undefined = isAuthenticated
+    ? accountItems
+    : guestCart && guestCart.items.flatMap((item) => {
+        const product = guestProducts?.find(p => p.id === item.product_id)
+        return product ? [{ id: item.product_id, product_id: item.product_id, quantity: item.quantity, product }] : []
+      })
+  const isLoading = isAuthenticated
+    ? accountLoading
+    : guestLoading || (guestIds.length > 0 && guestProductsLoading)
+
+  const removeItemMutation = useMutation(
+    (item: CartLine) => isAuthenticated ? api.removeFromCart(item.id) : api.removeFromGuestCart(item.product_id),
+    {
+      onSuccess: () => {
+        queryClient.invalidateQueries('cart')
+        toast.success(t('cart.itemRemoved'))
+      },
+      onError: (error: any) => {
+        toast.error(error.response?.data?.detail || t('cart.removeFailed'))
+      },
+    }
+  )
 
   const updateQuantityMutation = useMutation(
     ({ productId, quantity }: { productId: number; quantity: number }) =>
-      api.addToCart(productId, quantity - (cartItems?.find(item => item.product_id === productId)?.quantity || 0)),
+      isAuthenticated
+        ? api.addToCart(productId, quantity - (cartItems?.find(item => item.product_id === productId)?.quantity || 0))
+        : api.updateGuestCartItem(productId, quantity),
     {
       onSuccess: () => {
         queryClient.invalidateQueries('cart')
@@ -54,17 +87,6 @@ export default function CartPage() {
     }
   )
 
-  if (!isAuthenticated) {
-    return (
-      <div className="text-center py-12">
-        <h2 className="text-2xl font-bold text-gray-800 mb-4">{t('cart.pleaseLoginToView')}</h2>
-        <Link href="/login" className="btn-primary">
-          {t('cart.login')}
-        </Link>
-      </div>
-    )
-  }
-
   if (isLoading) {
     return (
       <div className="flex justify-center items-center min-h-screen">
@@ -96,7 +118,8 @@ export default function CartPage() {
   }
 
   const handleCheckout = () => {
-    router.push('/checkout')
+    // Guests sign in first; login merges the guest cart into the account cart
+    router.push(isAuthenticated ? '/checkout' : '/login')
   }
 
   return (
@@ -147,7 +170,7 @@ export default function CartPage() {
                 </p>
                 
                 <button
-                  onClick={() => removeItemMutation.mutate(item.id)}
+                  onClick={() => removeItemMutation.mutate(item)}
                   className="text-red-500 hover:text-red-700 mt-2"
                   disabled={removeItemMutation.isLoading}
                 >
@@ -8,6 +8,7 @@ import { Order } from '@/types'
 import { useAuthStore } from '@/store/authStore'
 import { CheckCircle, Package, Home } from 'lucide-react'
 import { useI18n } from '@/hooks/useI18n'
+import { useOrderUpdates } from '@/hooks/useOrderUpdates'
 
 export default function ConfirmationPage() {
   const searchParams = useSearchParams()
@@ -27,6 +28,7 @@ export default function ConfirmationPage() {
     () => api.getOrder(orderId),
     { enabled: isAuthenticated && !isNaN(orderId) }
   )
+  useOrderUpdates(orderId, isAuthenticated)
 
   if (!isAuthenticated) {
     return (
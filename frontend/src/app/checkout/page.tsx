@@ -95,12 +95,10 @@ export default function CheckoutPage() {
       setCartSnapshot([...cartItems])
 
       const orderData = {
-        total_amount: totalAmount,
         shipping_address: data.shipping_address,
         items: cartItems.map(item => ({
           product_id: item.product_id,
           quantity: item.quantity,
-          price: item.product.price,
         })),
       }
       
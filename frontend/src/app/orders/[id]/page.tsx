@@ -9,6 +9,7 @@ import Link from 'next/link'
 import { Package, Calendar, CheckCircle, XCircle, Clock } from 'lucide-react'
 import { useEffect, useState, useMemo } from 'react'
 import { useI18n } from '@/hooks/useI18n'
+import { useOrderUpdates } from '@/hooks/useOrderUpdates'
 
 interface OrderDetailPageProps {
   params: {
@@ -48,6 +49,7 @@ export default function OrderDetailPage({ params }: OrderDetailPageProps) {
       enabled: isAuthenticated && !isNaN(orderId),
     }
   )
+  useOrderUpdates(orderId, isAuthenticated)
 
   if (!isAuthenticated) {
     return (
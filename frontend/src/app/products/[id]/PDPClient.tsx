@@ -26,19 +26,27 @@ export default function PDPClient() {
     { enabled: !isNaN(productId) }
   )
 
-  // Fetch more products to show related items
+  // Frequently bought together, from the recommendations index
+  const { data: boughtTogether } = useQuery(
+    ['related', productId],
+    () => api.getRelatedProducts(productId, 4),
+    { enabled: !isNaN(productId) }
+  )
+
+  // Same-category products until the index has co-purchases for this product
   const { data: allProducts } = useQuery(
     ['products', 0, 50],
     () => api.getProducts(0, 50),
-    { enabled: true }
+    { enabled: boughtTogether !== undefined && boughtTogether.length === 0 }
   )
 
   const relatedProducts = useMemo(() => {
+    if (boughtTogether && boughtTogether.length > 0) return boughtTogether
     if (!product || !allProducts) return []
     return allProducts
       .filter(p => p.id !== product.id && p.category && p.category === product.category)
       .slice(0, 4)
-  }, [product, allProducts])
+  }, [product, boughtTogether, allProducts])
 
   // Quantity selector
   const [quantity, setQuantity] = useState(1)
@@ -51,7 +59,7 @@ export default function PDPClient() {
 
   const addToCartMutation = useMutation(
     ({ productId, quantity }: { productId: number; quantity: number }) =>
-      api.addToCart(productId, quantity),
+      isAuthenticated ? api.addToCart(productId, quantity) : api.addToGuestCart(productId, quantity),
     {
       onSuccess: () => {
         queryClient.invalidateQueries('cart')
@@ -80,10 +88,6 @@ export default function PDPClient() {
   }
 
   const handleAddToCart = () => {
-    if (!isAuthenticated) {
-      toast.error(t('common.pleaseLoginToAddToCart'))
-      return
-    }
     addToCartMutation.mutate({ productId: product.id, quantity })
   }
 
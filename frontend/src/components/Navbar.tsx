@@ -13,15 +13,24 @@ export default function Navbar() {
   const { user, isAuthenticated, logout } = useAuthStore()
   const { t } = useI18n()
   
-  const { data: cartItems } = useQuery(
-    'cart',
-    api.getCart,
+  // Server-computed and cached; invalidating 'cart' refreshes it as well
+  const { data: cartSummary } = useQuery(
+    ['cart', 'summary'],
+    api.getCartSummary,
     {
       enabled: isAuthenticated,
     }
   )
+  // Anonymous visitors' cart lives in a signed token; reading it costs no database work
+  const { data: guestCart } = useQuery(
+    ['cart', 'guest'],
+    api.getGuestCart,
+    {
+      enabled: !isAuthenticated,
+    }
+  )
 
-  const cartItemsCount = cartItems?.reduce((sum, item) => sum + item.quantity, 0) || 0
+  const cartItemsCount = (isAuthenticated ? cartSummary?.item_count : guestCart?.item_count) || 0
 
   return (
     <nav className="bg-white dark:bg-gray-900 shadow-lg">
@@ -36,20 +45,20 @@ export default function Navbar() {
               {t('nav.products')}
             </Link>
 
+            <Link 
+              href="/cart" 
+              className="relative text-gray-700 dark:text-gray-200 hover:text-primary-600 dark:hover:text-primary-400"
+            >
+              <ShoppingCart size={24} />
+              {cartItemsCount > 0 && (
+                <span className="absolute -top-2 -right-2 bg-primary-600 text-white text-xs rounded-full h-5 w-5 flex items-center justify-center">
+                  {cartItemsCount}
+                </span>
+              )}
+            </Link>
+
             {isAuthenticated ? (
               <>
-                <Link 
-                  href="/cart" 
-                  className="relative text-gray-700 dark:text-gray-200 hover:text-primary-600 dark:hover:text-primary-400"
-                >
-                  <ShoppingCart size={24} />
-                  {cartItemsCount > 0 && (
-                    <span className="absolute -top-2 -right-2 bg-primary-600 text-white text-xs rounded-full h-5 w-5 flex items-center justify-center">
-                      {cartItemsCount}
-                    </span>
-                  )}
-                </Link>
-
                 <div className="relative group">
                   <button className="flex items-center space-x-2 text-gray-700 dark:text-gray-200 hover:text-primary-600 dark:hover:text-primary-400">
                     <User size={20} />
@@ -30,7 +30,7 @@ export default function ProductCard({ product }: ProductCardProps) {
 
   const addToCartMutation = useMutation(
     ({ productId, quantity }: { productId: number; quantity: number }) =>
-      api.addToCart(productId, quantity),
+      isAuthenticated ? api.addToCart(productId, quantity) : api.addToGuestCart(productId, quantity),
     {
       onSuccess: () => {
         queryClient.invalidateQueries('cart')
@@ -43,10 +43,6 @@ export default function ProductCard({ product }: ProductCardProps) {
   )
 
   const handleAddToCart = () => {
-    if (!isAuthenticated) {
-      toast.error(t('common.pleaseLoginToAddToCart'))
-      return
-    }
     addToCartMutation.mutate({ productId: product.id, quantity: 1 })
   }
 
@@ -0,0 +1,26 @@
+import { useEffect } from 'react'
+import { useQueryClient } from 'react-query'
+import { api } from '@/lib/api'
+import { Order } from '@/types'
+
+// Keep the cached ['order', id] query in sync with server-pushed status changes
+export function useOrderUpdates(orderId: number, enabled: boolean) {
+  const queryClient = useQueryClient()
+
+  useEffect(() => {
+    if (!enabled || isNaN(orderId)) return
+    return api.subscribeToOrder(orderId, (update) => {
+      queryClient.setQueryData<Order | undefined>(['order', orderId], (prev) =>
+        prev
+          ? {
+              ...prev,
+              status: update.status,
+              payment_status: update.payment_status,
+              payment_intent_id: update.payment_intent_id ?? prev.payment_intent_id,
+              updated_at: update.updated_at ?? prev.updated_at,
+            }
+          : prev
+      )
+    })
+  }, [orderId, enabled, queryClient])
+}
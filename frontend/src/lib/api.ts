@@ -1,5 +1,5 @@
 import axios, { AxiosResponse } from 'axios'
-import { Product, User, CartItem, Order } from '@/types'
+import { Product, User, CartItem, CartSummary, GuestCart, Order, OrderStatusUpdate } from '@/types'
 
 const BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
@@ -17,6 +17,13 @@ apiClient.interceptors.request.use(
     if (token) {
       (config.headers as any).Authorization = `Bearer ${token}`
     }
+    // Anonymous cart token, only where the API reads it (guest cart calls and login,
+    // which merges it); a custom header on other calls would force a CORS preflight
+    const guestCart = typeof window !== 'undefined' ? localStorage.getItem('guestCart') : null
+    const url = config.url || ''
+    if (guestCart && (url.startsWith('/api/guest-cart') || url === '/api/auth/login')) {
+      (config.headers as any)['X-Guest-Cart'] = guestCart
+    }
     // Attach locale as Accept-Language from cookie if available
     if (typeof document !== 'undefined') {
       const m = document.cookie.match(/(?:^|; )NEXT_LOCALE=([^;]+)/)
@@ -77,7 +84,18 @@ export const api = {
     return response.data
   },
 
-  createProduct: async (product: Omit<Product, 'id' | 'created_at' | 'is_active'>): Promise<Product> => {
+  getProductsByIds: async (ids: number[]): Promise<Product[]> => {
+    if (ids.length === 0) return []
+    const response: AxiosResponse<Product[]> = await apiClient.get(`/api/products?ids=${ids.join(',')}`)
+    return response.data
+  },
+
+  getRelatedProducts: async (id: number, limit = 8): Promise<Product[]> => {
+    const response: AxiosResponse<Product[]> = await apiClient.get(`/api/products/${id}/related?limit=${limit}`)
+    return response.data
+  },
+
+  createProduct: async (product: Omit<Product, 'id' | 'created_at' | 'is_active' | 'price_cents' | 'currency'> & { currency?: string }): Promise<Product> => {
     const response: AxiosResponse<Product> = await apiClient.post('/api/products', product)
     return response.data
   },
@@ -88,6 +106,11 @@ export const api = {
     return response.data
   },
 
+  getCartSummary: async (): Promise<CartSummary> => {
+    const response: AxiosResponse<CartSummary> = await apiClient.get('/api/cart/summary')
+    return response.data
+  },
+
   addToCart: async (productId: number, quantity: number): Promise<CartItem> => {
     const response: AxiosResponse<CartItem> = await apiClient.post('/api/cart', {
       product_id: productId,
@@ -96,18 +119,47 @@ export const api = {
     return response.data
   },
 
+  getGuestCart: async (): Promise<GuestCart> => {
+    const response: AxiosResponse<GuestCart> = await apiClient.get('/api/guest-cart')
+    localStorage.setItem('guestCart', response.data.token)
+    return response.data
+  },
+
+  addToGuestCart: async (productId: number, quantity: number): Promise<GuestCart> => {
+    const response: AxiosResponse<GuestCart> = await apiClient.post('/api/guest-cart', {
+      product_id: productId,
+      quantity,
+    })
+    localStorage.setItem('guestCart', response.data.token)
+    return response.data
+  },
+
+  updateGuestCartItem: async (productId: number, quantity: number): Promise<GuestCart> => {
+    const response: AxiosResponse<GuestCart> = await apiClient.put('/api/guest-cart', {
+      product_id: productId,
+      quantity,
+    })
+    localStorage.setItem('guestCart', response.data.token)
+    return response.data
+  },
+
+  removeFromGuestCart: async (productId: number): Promise<GuestCart> => {
+    const response: AxiosResponse<GuestCart> = await apiClient.delete(`/api/guest-cart/${productId}`)
+    localStorage.setItem('guestCart', response.data.token)
+    return response.data
+  },
+
   removeFromCart: async (itemId: number): Promise<void> => {
     await apiClient.delete(`/api/cart/${itemId}`)
   },
 
   // Orders
+  // Prices and the total are computed server-side from the catalog
   createOrder: async (orderData: {
-    total_amount: number
     shipping_address: string
     items: Array<{
       product_id: number
       quantity: number
-      price: number
     }>
   }): Promise<Order> => {
     const response: AxiosResponse<Order> = await apiClient.post('/api/orders', orderData)
@@ -124,6 +176,38 @@ export const api = {
     return response.data
   },
 
+  // Server-sent order status updates; returns a function that closes the stream
+  subscribeToOrder: (id: number, onUpdate: (update: OrderStatusUpdate) => void): (() => void) => {
+    let source: EventSource | null = null
+    let closed = false
+    const close = () => {
+      closed = true
+      source?.close()
+    }
+    const connect = async () => {
+      try {
+        // EventSource cannot send headers, so the URL carries a short-lived token
+        // scoped to this order; the account token never goes in a URL
+        const response: AxiosResponse<{ token: string }> = await apiClient.post(`/api/orders/${id}/events-token`)
+        if (closed) return
+        source = new EventSource(`${BASE_URL}/api/orders/${id}/events?token=${encodeURIComponent(response.data.token)}`)
+        source.addEventListener('order', (event) => {
+          const update: OrderStatusUpdate = JSON.parse((event as MessageEvent).data)
+          onUpdate(update)
+          if (['delivered', 'cancelled'].includes(update.status)) close()
+        })
+        // Once the token has expired the browser stops reconnecting; fetch a fresh one
+        source.onerror = () => {
+          if (source?.readyState === EventSource.CLOSED && !closed) setTimeout(connect, 1000)
+        }
+      } catch {
+        if (!closed) setTimeout(connect, 5000)
+      }
+    }
+    connect()
+    return close
+  },
+
   // Payment methods
   createPaymentIntent: async (orderId: number): Promise<{client_secret: string, payment_intent_id: string}> => {
     const response: AxiosResponse<{client_secret: string, payment_intent_id: string}> = await apiClient.post('/api/create-payment-intent', {
@@ -25,6 +25,8 @@ export const useAuthStore = create<AuthState>((set, get) => ({
       
       localStorage.setItem('token', access_token)
       localStorage.setItem('user', JSON.stringify(user))
+      // The guest cart was merged into the account cart by the login call
+      localStorage.removeItem('guestCart')
       
       set({
         user,
@@ -10,6 +10,8 @@ export interface Product {
   name: string
   description?: string
   price: number
+  price_cents: number
+  currency: string
   image_url?: string
   category?: string
   stock_quantity: number
@@ -26,11 +28,40 @@ export interface CartItem {
   created_at: string
 }
 
+export interface GuestCart {
+  items: { product_id: number; quantity: number }[]
+  item_count: number
+  token: string
+}
+
+export interface CartSummaryLine {
+  cart_item_id: number
+  product_id: number
+  name: string
+  quantity: number
+  unit_price: number
+  unit_price_cents: number
+  line_total: number
+  line_total_cents: number
+  stock_quantity: number
+  in_stock: boolean
+}
+
+export interface CartSummary {
+  items: CartSummaryLine[]
+  item_count: number
+  subtotal: number
+  subtotal_cents: number
+  currency: string
+  all_in_stock: boolean
+}
+
 export interface OrderItem {
   id: number
   product_id: number
   quantity: number
   price: number
+  price_cents: number
   product: Product
 }
 
@@ -38,6 +69,8 @@ export interface Order {
   id: number
   user_id: number
   total_amount: number
+  total_amount_cents: number
+  currency: string
   status: 'pending' | 'confirmed' | 'shipped' | 'delivered' | 'cancelled'
   payment_status: 'pending' | 'succeeded' | 'failed' | 'canceled'
   payment_intent_id?: string
@@ -47,6 +80,15 @@ export interface Order {
   updated_at: string
 }
 
+export interface OrderStatusUpdate {
+  order_id: number
+  user_id: number
+  status: Order['status']
+  payment_status: Order['payment_status']
+  payment_intent_id?: string | null
+  updated_at?: string | null
+}
+
 export interface LoginResponse {
   access_token: string
   token_type: string